@@ -0,0 +1,441 @@
+/* Client-side rendering path for the normal distribution graph - mirrors update_graph, empirical_rule and the
+   curve functions in nor_model.py so the browser can build the figure without a round trip to the server.
+   Registered by nor_controller.py when NOR_RENDER_MODE=client. Also plays the animated z1 sweep streamed from /api/sweep (in both modes) */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    nor: (function () {
+        const INV_SQRT_2PI = 1 / Math.sqrt(2 * Math.PI);
+        // Colour palette - keep in sync with stat_colours in nor_model.py
+        const statColours = {
+            "norm": "#d10373",
+            "z": "rgba(158, 171, 5, 0.5)",
+            "mean": "#f49103",
+            "+-1std": "#0085a1",
+            "+-2std": "#003896",
+            "+-3std": "#006338"
+        };
+
+        // Normal pdf at each x for mean (mu) and standard deviation (sigma)
+        function normalPdf(x, mu, sigma) {
+            return x.map(function (xi) {
+                const z = (xi - mu) / sigma;
+                return Math.exp(-0.5 * z * z) * INV_SQRT_2PI / sigma;
+            });
+        }
+
+        // Normal cdf using Marsaglia's Taylor series, accurate to double precision for |z| < 8
+        function normalCdf(x, mu, sigma) {
+            const z = (x - mu) / sigma;
+            if (z < -8) {
+                return 0;
+            }
+            if (z > 8) {
+                return 1;
+            }
+            let sum = z;
+            let term = z;
+            let previous = 0;
+            for (let i = 3; sum !== previous; i += 2) {
+                previous = sum;
+                term = term * z * z / i;
+                sum = previous + term;
+            }
+            return 0.5 + sum * Math.exp(-0.5 * z * z) * INV_SQRT_2PI;
+        }
+
+        // Input validation limits - keep in sync with nor_inputs.py
+        const INPUT_DECIMALS = 4;
+        const SIGMA_MIN = 0.1;
+        const VALUE_MAX = 1e6;
+        const Z_RANGE = 4;
+        const CALC_TYPES = ["<", ">", "<>", "><"];
+
+        // Round a number to decimals places as Python's round(value, decimals) does for floats - to the nearest decimal, with exact ties to even
+        // toFixed rounds the exact binary value, so it only differs from Python on exact ties, which are the odd multiples of 2^-(decimals + 1)
+        function pyRound(value, decimals) {
+            const tieScale = Math.pow(2, decimals + 1);
+            if (Number.isInteger(value * tieScale) && Math.abs(value * tieScale) % 2 === 1) {
+                let n = Math.floor(value * Math.pow(10, decimals));
+                if (n % 2 !== 0) {
+                    n += 1;
+                }
+                return n / Math.pow(10, decimals) + 0;
+            }
+            // Adding 0 turns -0 into 0
+            return Number(value.toFixed(decimals)) + 0;
+        }
+
+        // Probability as a percentage rounded to 2 decimal places, as round(p*100, 2) does in calculate_probability_z1 and calculate_probability_z1_z2
+        function roundProbability(p) {
+            return pyRound(p * 100, 2);
+        }
+
+        // Format numbers as Python formats a float ("2.0" rather than "2")
+        function formatFloat(value) {
+            return Number.isInteger(value) ? value.toFixed(1) : String(value);
+        }
+
+        // Round a number to INPUT_DECIMALS places as quantize in nor_inputs.py - returns [value, text] with text as Python shows the value, or null if it is not a finite number within +/-VALUE_MAX
+        // Dash sends whole numbers as JSON integers, which Python keeps as ints, so a number is treated as a float (rounded and shown as one) if it is not whole or isFloat is set
+        function quantize(value, isFloat) {
+            if (typeof value !== "number" || !(Math.abs(value) <= VALUE_MAX)) {
+                return null;
+            }
+            if (!isFloat && Number.isInteger(value)) {
+                return [value, String(value)];
+            }
+            const rounded = pyRound(value, INPUT_DECIMALS);
+            return [rounded, formatFloat(rounded)];
+        }
+
+        function formatLimit(value) {
+            return value.toLocaleString("en-US", {"maximumFractionDigits": 0});
+        }
+
+        // Validate and normalise user entry values as normalise_inputs in nor_inputs.py - mu and sigma are quantized, sigma must be at least SIGMA_MIN, and z1 and z2 are quantized
+        // and clamped to mu +/- Z_RANGE * sigma (z2 is set to null for "<" and ">"). Missing z values are passed through
+        // Returns {"error": message, "input": input} for invalid values, where input is the input the error is for ("calc_type", "mu", "sigma" or "z" for z1 and z2), otherwise the normalised values as [value, text] pairs (see quantize)
+        function normaliseInputs(mu, sigma, calcType, z1, z2) {
+            if (CALC_TYPES.indexOf(calcType) < 0) {
+                return {"error": "Select a calculation type", "input": "calc_type"};
+            }
+            mu = quantize(mu);
+            sigma = quantize(sigma);
+            if (mu === null) {
+                return {"error": "The mean must be a number between " + formatLimit(-VALUE_MAX) + " and " + formatLimit(VALUE_MAX), "input": "mu"};
+            }
+            if (sigma === null || sigma[0] < SIGMA_MIN) {
+                return {"error": "The standard deviation must be a number between " + SIGMA_MIN + " and " + formatLimit(VALUE_MAX), "input": "sigma"};
+            }
+            // The clamp limits are floats in Python unless the mean and standard deviation are both ints
+            const limitsFloat = mu[1].indexOf(".") >= 0 || sigma[1].indexOf(".") >= 0;
+            const low = mu[0] - Z_RANGE * sigma[0];
+            const high = mu[0] + Z_RANGE * sigma[0];
+            const values = {"mu": mu, "sigma": sigma};
+            const zValues = {"z1": z1, "z2": calcType === "<" || calcType === ">" ? null : z2};
+            for (const name of ["z1", "z2"]) {
+                let z = zValues[name];
+                if (z !== null && z !== undefined) {
+                    z = quantize(z);
+                    if (z === null) {
+                        return {"error": name + " must be a number between " + formatLimit(-VALUE_MAX) + " and " + formatLimit(VALUE_MAX), "input": "z"};
+                    }
+                    if (z[0] < low || z[0] > high) {
+                        z = quantize(z[0] < low ? low : high, limitsFloat);
+                    }
+                } else {
+                    z = [null, "None"];
+                }
+                values[name] = z;
+            }
+            return values;
+        }
+
+        // Validation outputs (z1 and z2 invalid, error, mu and sigma invalid and the distribution error) for inputs rejected by normaliseInputs - see input_error_outputs in nor_controller.py
+        function inputErrorOutputs(inputs) {
+            if (inputs.input === "mu" || inputs.input === "sigma") {
+                return [false, false, "", inputs.input === "mu", inputs.input === "sigma", inputs.error];
+            }
+            return [true, true, inputs.error, false, false, ""];
+        }
+
+        // Evenly spaced values between start and stop, as np.linspace
+        function linspace(start, stop, num) {
+            const step = (stop - start) / (num - 1);
+            const values = [];
+            for (let i = 0; i < num; i++) {
+                values.push(start + i * step);
+            }
+            values[num - 1] = stop;
+            return values;
+        }
+
+        // Curve section from xStart to xEnd, sliced from the standard sampling grid - see _curve_between in nor_model.py
+        function curveBetween(sampling, mu, sigma, xStart, xEnd) {
+            const stdZ = sampling.std_z;
+            const zLow = Math.min((xStart - mu) / sigma, (xEnd - mu) / sigma);
+            const zHigh = Math.max((xStart - mu) / sigma, (xEnd - mu) / sigma);
+            let x = [Math.min(xStart, xEnd)];
+            for (let i = 0; i < stdZ.length; i++) {
+                if (stdZ[i] > zLow && stdZ[i] < zHigh) {
+                    x.push(mu + sigma * stdZ[i]);
+                }
+            }
+            x.push(Math.max(xStart, xEnd));
+            if (xStart > xEnd) {
+                x = x.reverse();
+            }
+            return [x, normalPdf(x, mu, sigma)];
+        }
+
+        function shadedTrace(x, y, extra) {
+            return Object.assign({
+                "x": x,
+                "y": y,
+                "marker": {"color": statColours["norm"]},
+                "fill": "tozeroy",
+                "fillcolor": statColours["z"],
+                "type": "scatter"
+            }, extra);
+        }
+
+        // Graph lines for mean and +/-1/2/3SD, one trace for the mean and one for each +/- pair with the lines separated by gaps - see empirical_rule_traces in nor_model.py
+        function empiricalRule(fig, mu, sigma) {
+            const groups = [[0, "Mean", statColours["mean"]], [1, "Mean ± 1SD", statColours["+-1std"]], [2, "Mean ± 2SD", statColours["+-2std"]], [3, "Mean ± 3SD", statColours["+-3std"]]];
+            const steps = linspace(0, 1, 10);
+            groups.forEach(function (group) {
+                const k = group[0];
+                const offsets = k === 0 ? [0] : [k, -k];
+                const trace = {"x": [], "y": [], "text": [], "mode": "lines+markers", "name": group[1], "marker": {"color": group[2], "opacity": 0},
+                               "hovertemplate": "%{text}: %{x:.3f}<extra></extra>", "type": "scatter"};
+                offsets.forEach(function (offset) {
+                    const lineX = mu + offset * sigma;
+                    const height = normalPdf([lineX], mu, sigma)[0];
+                    const label = offset === 0 ? "Mean" : "Mean " + (offset > 0 ? "+" : "-") + " " + Math.abs(offset) + "SD";
+                    steps.forEach(function (step) {
+                        trace.x.push(lineX);
+                        trace.y.push(height * step);
+                        trace.text.push(label);
+                    });
+                    trace.x.push(null);
+                    trace.y.push(null);
+                    trace.text.push(null);
+                });
+                fig.data.push(trace);
+            });
+            fig.layout.dragmode = false;
+        }
+
+        // Callback function to update normal distribution graph, results and associated screen reader text - see update_graph in nor_controller.py
+        // The whole figure is rebuilt in the browser, so the rendered inputs used for server-side partial updates are not needed
+        function updateGraph(n_clicks, mu, sigma, calc_type, z1, z2, rendered, figure, sampling) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (n_clicks === null || n_clicks === undefined || mu === null || mu === undefined || sigma === null || sigma === undefined) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            // Reject or normalise the inputs before any numeric work, as the server does
+            const inputs = normaliseInputs(mu, sigma, calc_type, z1, z2);
+            if (inputs.error) {
+                return [noUpdate, "", ...inputErrorOutputs(inputs), noUpdate, "", "", "", null];
+            }
+            const [muText, sigmaText, z1Text, z2Text] = [inputs.mu[1], inputs.sigma[1], inputs.z1[1], inputs.z2[1]];
+            [mu, sigma, z1, z2] = [inputs.mu[0], inputs.sigma[0], inputs.z1[0], inputs.z2[0]];
+            // Reuse the template of the current figure so the plotly.py theme is kept
+            const layout = {
+                "margin": {"t": 20, "b": 10, "l": 20, "r": 20},
+                "height": 400,
+                "font": {"size": 14},
+                "template": figure.layout.template,
+                "xaxis": {"dtick": Math.ceil(sigma / 2)}
+            };
+            const base = curveBetween(sampling, mu, sigma, mu + sigma * sampling.z_min, mu + sigma * sampling.z_max);
+            const fig = {
+                "data": [{
+                    "x": base[0],
+                    "y": base[1],
+                    "dx": 1,
+                    "x0": -4,
+                    "marker": {"color": statColours["norm"]},
+                    "name": "Normal distribution",
+                    "hoverinfo": "skip",
+                    "type": "scatter"
+                }],
+                "layout": layout
+            };
+            const lowerEnd = mu + sigma * sampling.z_min;
+            const upperEnd = mu + sigma * sampling.z_max;
+            let probability;
+            let srNorm;
+            if (calc_type === "<" || calc_type === ">") {
+                if (z1 === null || z1 === undefined) {
+                    return [fig, "", true, false, "Enter a value for z1", false, false, "", noUpdate, "", "", "", null];
+                }
+                const x1 = normalCdf(z1, mu, sigma);
+                if (calc_type === "<") {
+                    probability = roundProbability(x1);
+                    const section = curveBetween(sampling, mu, sigma, lowerEnd, z1);
+                    fig.data.push(shadedTrace(section[0], section[1], {"name": "Probability", "hoveron": "fills"}));
+                    srNorm = "Normal distribution graph with mean " + muText + ", standard deviation " + sigmaText + " and probability that Z is less than " + z1Text + " of " + formatFloat(probability) + "%";
+                } else {
+                    probability = roundProbability(1 - x1);
+                    const section = curveBetween(sampling, mu, sigma, z1, upperEnd);
+                    fig.data.push(shadedTrace(section[0], section[1], {"name": "Probability"}));
+                    srNorm = "Normal distribution graph with mean " + muText + ", standard deviation " + sigmaText + " and probability that Z is greater than " + z1Text + " of " + formatFloat(probability) + "%";
+                }
+            } else if (calc_type === "<>" || calc_type === "><") {
+                if (z1 === null || z1 === undefined || z2 === null || z2 === undefined) {
+                    return [fig, "", true, true, "Enter values for z1 and z2", false, false, "", noUpdate, "", "", "", null];
+                }
+                if (z1 > z2) {
+                    return [fig, "", true, true, "z1 must be less than z2", false, false, "", noUpdate, "", "", "", null];
+                }
+                if (calc_type === "<>") {
+                    probability = roundProbability(normalCdf(Math.max(z1, z2), mu, sigma) - normalCdf(Math.min(z1, z2), mu, sigma));
+                    const section = curveBetween(sampling, mu, sigma, Math.max(z1, z2), Math.min(z1, z2));
+                    fig.data.push(shadedTrace(section[0], section[1], {"name": "Probability"}));
+                    srNorm = "Normal distribution with mean " + muText + ", standard deviation " + sigmaText + ", and probability that Z is between " + z1Text + " and " + z2Text + " of " + formatFloat(probability) + "%";
+                } else {
+                    probability = roundProbability(normalCdf(z1, mu, sigma) + (1 - normalCdf(z2, mu, sigma)));
+                    const lower = curveBetween(sampling, mu, sigma, lowerEnd, z1);
+                    const upper = curveBetween(sampling, mu, sigma, z2, upperEnd);
+                    fig.data.push(shadedTrace(lower[0], lower[1], {"name": "Probability"}));
+                    fig.data.push(shadedTrace(upper[0], upper[1], {"showlegend": false}));
+                    srNorm = "Normal distribution with mean " + muText + ", standard deviation " + sigmaText + ", and probability that Z is less than " + z1Text + " and greater than " + z2Text + " of " + formatFloat(probability) + "%";
+                }
+            }
+            empiricalRule(fig, mu, sigma);
+            return [fig, srNorm, false, false, "", false, false, "", {"display": "inline"}, muText, sigmaText, formatFloat(probability) + "%", null];
+        }
+
+        // Animated z1 sweep - milliseconds each frame is shown, and the request streaming the sweep in progress (aborted when a new sweep starts or the graph is replaced)
+        const SWEEP_FRAME_DURATION = 50;
+        let sweepRequest = null;
+
+        // Graph div created by plotly inside the dcc.Graph component
+        function graphDiv() {
+            return document.querySelector("#normal-dist-fig .js-plotly-plot");
+        }
+
+        // Stop the sweep in progress - abort its stream and drop the frames queued to play
+        function stopSweep() {
+            if (sweepRequest) {
+                sweepRequest.abort();
+                sweepRequest = null;
+            }
+            const gd = graphDiv();
+            if (gd) {
+                window.Plotly.animate(gd, [], {"mode": "immediate"});
+            }
+        }
+
+        // Show the graph at the start of the sweep, or add a chunk of frames and queue them to play after the frames already queued
+        async function showSweepMessage(gd, message, signal) {
+            if (message.figure) {
+                await window.Plotly.animate(gd, [], {"mode": "immediate"});
+                if (signal.aborted) {
+                    return;
+                }
+                message.figure.frames = [];
+                await window.Plotly.react(gd, message.figure);
+            } else {
+                await window.Plotly.addFrames(gd, message.frames);
+                if (signal.aborted) {
+                    return;
+                }
+                window.Plotly.animate(gd, message.frames.map(function (frame) { return frame.name; }), {
+                    "frame": {"duration": SWEEP_FRAME_DURATION, "redraw": true},
+                    "transition": {"duration": 0},
+                    "mode": "afterall"
+                });
+            }
+        }
+
+        // Read the newline delimited JSON streamed by /api/sweep (see sweep_stream in nor_controller.py), playing each chunk of frames as it arrives - stops once the signal is aborted
+        async function playSweep(response, signal) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = "";
+            for (;;) {
+                const chunk = await reader.read();
+                if (chunk.done) {
+                    break;
+                }
+                buffered += decoder.decode(chunk.value, {"stream": true});
+                const lines = buffered.split("\n");
+                buffered = lines.pop();
+                for (const line of lines) {
+                    if (signal.aborted) {
+                        return;
+                    }
+                    if (line) {
+                        await showSweepMessage(graphDiv(), JSON.parse(line), signal);
+                    }
+                }
+            }
+        }
+
+        // Start the sweep for the query - returns null once the stream has started playing (it carries on after this returns), or the error message /api/sweep rejected the query with
+        async function startSweep(query, signal) {
+            const config = JSON.parse(document.getElementById("_dash-config").textContent);
+            const response = await fetch(config.requests_pathname_prefix + "api/sweep", {
+                "method": "POST",
+                "headers": {"Content-Type": "application/json"},
+                "body": JSON.stringify(query),
+                "signal": signal
+            });
+            if (!response.ok) {
+                const body = await response.json().catch(function () { return {}; });
+                return body.error || "The sweep could not be started";
+            }
+            playSweep(response, signal).catch(function (error) {
+                if (error.name !== "AbortError") {
+                    console.error(error);
+                }
+            });
+            return null;
+        }
+
+        // Callback function to start the animated z1 sweep for mean (mu), standard deviation (sigma), calculation type and z2 - returns the rendered inputs (cleared, as the graph is replaced),
+        // screen reader text, z2, mean and standard deviation validation and the results style once the stream has started, or the validation error for the inputs
+        // (checked as normalise_inputs, then by /api/sweep)
+        // Submit and Compare replace the graph, so they stop the sweep in progress
+        function sweep(n_clicks, submit_clicks, compare_clicks, mu, sigma, calc_type, z2) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = window.dash_clientside.callback_context.triggered.map(function (trigger) { return trigger.prop_id; });
+            if (triggered.indexOf("sweep.n_clicks") < 0) {
+                stopSweep();
+                throw window.dash_clientside.PreventUpdate;
+            }
+            if (!n_clicks) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const inputs = normaliseInputs(mu, sigma, calc_type, null, z2);
+            if (inputs.error) {
+                return [noUpdate, noUpdate, ...inputErrorOutputs(inputs).slice(1), noUpdate];
+            }
+            const twoSided = calc_type === "<>" || calc_type === "><";
+            const start = inputs.mu[0] - Z_RANGE * inputs.sigma[0];
+            if (twoSided && (inputs.z2[0] === null || inputs.z2[0] <= start)) {
+                return [noUpdate, noUpdate, true, "Enter a value for z2 greater than " + start + " to sweep z1", false, false, "", noUpdate];
+            }
+            stopSweep();
+            const request = new AbortController();
+            sweepRequest = request;
+            const query = {"mu": inputs.mu[0], "sigma": inputs.sigma[0], "calc_type": calc_type, "z2": twoSided ? inputs.z2[0] : null};
+            return startSweep(query, request.signal).then(function (error) {
+                if (error) {
+                    return [noUpdate, noUpdate, true, error, false, false, "", noUpdate];
+                }
+                const end = twoSided ? inputs.z2[0] : inputs.mu[0] + Z_RANGE * inputs.sigma[0];
+                const srNorm = "Animation of the normal distribution with mean " + inputs.mu[1] + " and standard deviation " + inputs.sigma[1] + " showing the probability as z1 sweeps from " + start + " to " + end;
+                return [null, srNorm, false, "", false, false, "", {"display": "none"}];
+            }, function (error) {
+                if (error.name !== "AbortError") {
+                    console.error(error);
+                }
+                throw window.dash_clientside.PreventUpdate;
+            });
+        }
+
+        // Session id for this browser tab, set once when the page loads - the session-id store keeps it in sessionStorage, and update_graph uses it to key
+        // the server-side session store (letters, digits and hyphens only, as checked by nor_inputs.is_session_id)
+        function sessionId(modified_timestamp, session_id) {
+            if (session_id) {
+                return window.dash_clientside.no_update;
+            }
+            if (window.crypto && window.crypto.randomUUID) {
+                return window.crypto.randomUUID();
+            }
+            const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+            return Array.from(bytes, function (b) {
+                return b.toString(16).padStart(2, "0");
+            }).join("");
+        }
+
+        return {
+            update_graph: updateGraph,
+            sweep: sweep,
+            session_id: sessionId
+        };
+    })()
+});
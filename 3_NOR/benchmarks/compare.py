@@ -0,0 +1,53 @@
+import argparse
+import json
+import sys
+
+# Compare two result files written with --json by the same benchmark script (e.g. on two commits), listing the change in each timing and throughput
+# Run from the 3_NOR directory: python benchmarks/compare.py base.json new.json [--metrics p50_ms p99_ms] [--threshold 10]
+# Exits with status 1 if any compared metric is worse by more than the threshold percentage
+
+# Metrics compared by default for each suite, and whether higher values are better
+default_metrics = {"microbenchmarks": ["median_us"],
+                   "end_to_end": ["p50_ms", "p99_ms", "mean_response_bytes"],
+                   "load_test": ["requests_per_second", "p50_ms", "p99_ms"],
+                   "wire_bytes": ["gzip_bytes", "br_bytes", "repeat_visit_bytes"]}
+higher_is_better = {"requests_per_second"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", help="results to compare against")
+    parser.add_argument("new", help="results to compare")
+    parser.add_argument("--metrics", nargs="+", help="metrics to compare (default depends on the suite)")
+    parser.add_argument("--threshold", type=float, default=10, help="percentage change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if base["suite"] != new["suite"]:
+        sys.exit(f"Cannot compare {base['suite']} results with {new['suite']} results")
+    if base["settings"] != new["settings"]:
+        print(f"Warning: settings differ - {base['settings']} and {new['settings']}")
+
+    regressions = 0
+    print(f"{base['suite']}: {base['commit']} ({base['time']}) -> {new['commit']} ({new['time']})\n")
+    print(f"{'Benchmark':<52}{'Metric':<22}{'base':>12}{'new':>12}{'change':>10}")
+    for name, base_result in base["results"].items():
+        if name not in new["results"]:
+            continue
+        for metric in args.metrics or default_metrics.get(base["suite"], []):
+            if metric not in base_result or metric not in new["results"][name]:
+                continue
+            before, after = base_result[metric], new["results"][name][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = change < -args.threshold if metric in higher_is_better else change > args.threshold
+            regressions += worse
+            print(f"{name:<52}{metric:<22}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%{'  regression' if worse else ''}")
+    print(f"\n{regressions} regression(s) over {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
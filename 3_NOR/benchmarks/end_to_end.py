@@ -0,0 +1,87 @@
+import argparse
+import json
+import random
+import time
+
+# workload puts the app directory on sys.path, so it is imported before the app modules
+from workload import calc_types, input_mix, latency_summary, random_z, set_z_min_max_payload, sigmas, update_graph_payload, write_results
+from nor_controller import app, graph_cache, session_store, warm_caches, warm_inputs
+
+# End to end callback benchmarks - POSTs to /_dash-update-component through the Flask test client, timing Dash's request handling, the callback and response serialization
+# Run from the 3_NOR directory: python benchmarks/end_to_end.py [--requests 500] [--json e2e.json]
+
+
+# Request payloads for each scenario, by name - update_graph with the graph cache missed, hit and patched, an input error, set_z_min_max and the realistic input mix from workload
+def scenarios(count, seed):
+    rng = random.Random(seed)
+    new_inputs = []
+    for _ in range(count):
+        mu, sigma, calc_type = round(rng.uniform(-100, 100), 1), rng.choice(sigmas), rng.choice(calc_types)
+        new_inputs.append((mu, sigma, calc_type, *random_z(rng, mu, sigma, calc_type)))
+    return {
+        # Graph cache cleared before every request, so each builds and serializes the full figure
+        "update_graph full miss": ([update_graph_payload(*inputs, rendered=None) for inputs in new_inputs], True),
+        "update_graph full hit": ([update_graph_payload(*warm_inputs[i % len(warm_inputs)], rendered=None) for i in range(count)], False),
+        # Same distribution as the graph on screen, new z values - the shaded traces are patched
+        "update_graph patch z": ([update_graph_payload(mu, sigma, calc_type, z1, z2, rendered={"mu": mu, "sigma": sigma, "calc_type": "<", "z1": mu, "z2": None})
+                                  for mu, sigma, calc_type, z1, z2 in new_inputs], True),
+        # New distribution - the base curve and empirical rule lines are patched too
+        "update_graph patch mu sigma": ([update_graph_payload(*inputs, rendered={"mu": 0, "sigma": 1, "calc_type": "<", "z1": 1.96, "z2": None})
+                                         for inputs in new_inputs], True),
+        # Each distribution with every calculation type in turn, in one session - after the first, the base curve comes from the session store
+        "update_graph session calc type": ([update_graph_payload(mu, sigma, calc_type, *random_z(random.Random(n), mu, sigma, calc_type),
+                                                                 rendered={"mu": mu, "sigma": sigma, "calc_type": "<", "z1": mu, "z2": None}, session="end-to-end")
+                                            for n, (mu, sigma, *_) in enumerate(new_inputs[:(count + 3) // 4]) for calc_type in calc_types][:count], True),
+        "update_graph invalid": ([update_graph_payload(0, 1, "<>", 1, -1, rendered=None)] * count, False),
+        "set_z_min_max": ([set_z_min_max_payload(mu, sigma) for mu, sigma, *_ in new_inputs], False),
+        "update_graph realistic mix": ([update_graph_payload(*inputs, session="end-to-end") for inputs in input_mix(count, seed)], False)
+    }
+
+
+# Time each request, returning latencies in seconds and response sizes in bytes
+def run(client, payloads, clear_cache):
+    seconds, sizes = [], []
+    for payload in payloads:
+        body = json.dumps(payload)
+        if clear_cache:
+            graph_cache.clear()
+        start = time.perf_counter()
+        response = client.post("/_dash-update-component", data=body, content_type="application/json")
+        seconds.append(time.perf_counter() - start)
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{payload['output']} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        sizes.append(len(response.get_data()))
+    return seconds, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time update_graph and set_z_min_max requests through the Flask test client")
+    parser.add_argument("--requests", type=int, default=500, help="number of requests per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated inputs")
+    parser.add_argument("--filter", default="", help="only run scenarios whose name contains this text")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    client = app.server.test_client()
+    results = {}
+    print(f"{'Scenario':<32}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}{'bytes':>10}")
+    for name, (payloads, clear_cache) in scenarios(args.requests, args.seed).items():
+        if args.filter not in name:
+            continue
+        graph_cache.clear()
+        session_store.clear()
+        warm_caches()
+        # Untimed pass, so imports and first-call setup are not counted
+        run(client, payloads[:10], clear_cache)
+        seconds, sizes = run(client, payloads, clear_cache)
+        results[name] = {**latency_summary(seconds),
+                         "requests_per_second": len(seconds) / sum(seconds),
+                         "mean_response_bytes": sum(sizes) / len(sizes)}
+        result = results[name]
+        print(f"{name:<32}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['requests_per_second']:>10.0f}{result['mean_response_bytes']:>10.0f}")
+    if args.json:
+        write_results(args.json, "end_to_end", results, requests=args.requests, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import timeit
+
+# Per-request cost of building and serializing the update_graph figure with the plain-dict builder (nor_figure) against plotly.graph_objects
+# (tests/test_figure.py checks both give the same figure). Run from the 3_NOR directory: python benchmarks/figure_builder.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.graph_objects as go
+from nor_controller import build_figure, build_graph
+from nor_figure import to_json
+
+inputs = [(0, 1, "<", 1.96, None),
+          (0, 1, ">", -1.645, None),
+          (10, 2.5, "<>", 8, 13),
+          (5, 0.3, "><", 4.8, 5.5)]
+
+
+def main(number=200):
+    print(f"{'Inputs':<32}{'dict (ms)':>12}{'go (ms)':>12}{'speedup':>10}")
+    for mu, sigma, calc_type, z1, z2 in inputs:
+        fig = build_figure(mu, sigma, calc_type, z1, z2)[0]
+        # Full uncached request with the dict builder, and the same request with the figure validated by go.Figure instead of serialized directly
+        dict_seconds = timeit.timeit(lambda: build_graph(mu, sigma, calc_type, z1, z2), number=number) / number
+        serialize_seconds = timeit.timeit(lambda: to_json(fig), number=number) / number
+        validate_seconds = timeit.timeit(lambda: go.Figure(fig).to_json(), number=number) / number
+        go_seconds = dict_seconds - serialize_seconds + validate_seconds
+        label = f"mu={mu} sigma={sigma} {calc_type} {z1} {z2}"
+        print(f"{label:<32}{dict_seconds * 1000:>12.3f}{go_seconds * 1000:>12.3f}{go_seconds / dict_seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# workload puts the app directory on sys.path, so it is imported before the app modules
+from workload import app_dir, input_mix, latency_summary, update_graph_payload, write_results
+
+# Local load generator - starts the production server (gunicorn with gunicorn.conf.py) for each worker count and sends the realistic input mix from workload
+# from concurrent clients over keep-alive connections, reporting throughput and tail latency. Run from the 3_NOR directory:
+# python benchmarks/load_test.py [--workers 1 2 4] [--clients 16] [--seconds 10] [--json load.json]
+# The clients share one Python process, so on small machines they compete with the server for CPU - compare results measured on the same machine
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Start gunicorn with a number of workers, returning once the layout is served
+def start_server(workers, threads, port, timeout=60):
+    env = {**os.environ, "PORT": str(port), "NOR_WORKERS": str(workers), "NOR_THREADS": str(threads)}
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "wsgi:server"],
+                              cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/_dash-layout")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"gunicorn did not serve the layout within {timeout} seconds")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+# One client - sends its payloads in turn over a keep-alive connection until stop_time, recording latencies and errors
+def client(port, bodies, stop_time, latencies, errors):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    i = 0
+    while time.perf_counter() < stop_time:
+        start = time.perf_counter()
+        try:
+            connection.request("POST", "/_dash-update-component", body=bodies[i % len(bodies)], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status in (200, 204):
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        i += 1
+    connection.close()
+
+
+# Run clients against the server on port for a number of seconds after a warm up period, returning throughput and latency results
+def run_load(port, clients, seconds, warmup, requests_per_client, seed):
+    # Separate input sequences for the warm up, so the measured run does not start with inputs the server has just cached
+    bodies = [[json.dumps(update_graph_payload(*inputs, session=f"load-{n}")).encode() for inputs in input_mix(requests_per_client, seed + n)] for n in range(2 * clients)]
+    results = []
+    for run, duration in enumerate((warmup, seconds)):
+        latencies, errors = [], []
+        stop_time = time.perf_counter() + duration
+        threads = [threading.Thread(target=client, args=(port, bodies[(1 - run) * clients + n], stop_time, latencies, errors)) for n in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results.append((latencies, errors, time.perf_counter() - start))
+    latencies, errors, elapsed = results[-1]
+    if not latencies:
+        raise RuntimeError(f"No successful requests, errors: {errors[:10]}")
+    return {**latency_summary(latencies),
+            "requests_per_second": len(latencies) / elapsed,
+            "errors": len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the gunicorn server with the realistic update_graph input mix across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="gunicorn worker counts to test")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gunicorn worker")
+    parser.add_argument("--clients", type=int, default=16, help="number of concurrent clients")
+    parser.add_argument("--seconds", type=float, default=10, help="length of each measured run")
+    parser.add_argument("--warmup", type=float, default=2, help="length of the unmeasured run before each measured run")
+    parser.add_argument("--requests-per-client", type=int, default=200, help="length of each client's input sequence, repeated as needed")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated inputs")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'Workers':<10}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}{'errors':>8}")
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(workers, args.threads, port)
+        try:
+            result = run_load(port, args.clients, args.seconds, args.warmup, args.requests_per_client, args.seed)
+        finally:
+            stop_server(server)
+        results[f"workers={workers}"] = result
+        print(f"{workers:<10}{result['requests_per_second']:>10.0f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}{result['errors']:>8}")
+    if args.json:
+        write_results(args.json, "load_test", results, threads=args.threads, clients=args.clients, seconds=args.seconds,
+                      warmup=args.warmup, requests_per_client=args.requests_per_client, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
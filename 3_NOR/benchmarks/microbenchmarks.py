@@ -0,0 +1,68 @@
+import argparse
+import timeit
+
+# workload puts the app directory on sys.path, so it is imported before the app modules
+from workload import calc_types, sigmas, write_results
+import numpy as np
+from nor_controller import empirical_rule, overlay_figure
+from nor_model import normal_distribution, calculate_probability_z1, calculate_probability_z1_z2, create_blank_fig, warm_model
+
+# Microbenchmarks of the model and figure functions behind update_graph, for each calculation type and a range of standard deviations
+# Run from the 3_NOR directory: python benchmarks/microbenchmarks.py [--json micro.json]
+mu = 10
+
+
+# Functions to time, by benchmark name - z1 is 1SD below the mean and z2 1.5SD above
+def benchmarks():
+    cases = {"create_blank_fig": lambda: create_blank_fig()}
+    # Comparison mode with 1 to 20 overlaid distributions, means spread over +/-50 and sigmas from 0.1 to 30
+    rng = np.random.default_rng(0)
+    for curves in (1, 5, 20):
+        overlay_mu, overlay_sigma = rng.uniform(-50, 50, curves), rng.uniform(0.1, 30, curves)
+        for calc_type in calc_types:
+            cases[f"overlay_figure {calc_type} curves={curves}"] = lambda calc_type=calc_type, overlay_mu=overlay_mu, overlay_sigma=overlay_sigma: overlay_figure(overlay_mu, overlay_sigma, calc_type, -5, 5)
+    for sigma in sigmas:
+        z1, z2 = mu - sigma, mu + 1.5 * sigma
+        cases[f"normal_distribution sigma={sigma}"] = lambda sigma=sigma: normal_distribution(mu, sigma)
+        cases[f"empirical_rule sigma={sigma}"] = lambda sigma=sigma: empirical_rule({"data": [], "layout": {}}, mu, sigma)
+        for calc_type in calc_types:
+            if calc_type in ("<", ">"):
+                cases[f"calculate_probability_z1 {calc_type} sigma={sigma}"] = lambda sigma=sigma, calc_type=calc_type, z1=z1: calculate_probability_z1(mu, sigma, z1, calc_type)
+            else:
+                cases[f"calculate_probability_z1_z2 {calc_type} sigma={sigma}"] = lambda sigma=sigma, calc_type=calc_type, z1=z1, z2=z2: calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
+    return cases
+
+
+# Median and best time per call in seconds over repeat runs, each run long enough to take about min_seconds
+def time_call(function, repeat, min_seconds):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_seconds / 0.2))
+    runs = sorted(seconds / number for seconds in timer.repeat(repeat=repeat, number=number))
+    return {"calls": number * repeat,
+            "median_us": runs[repeat // 2] * 1e6,
+            "min_us": runs[0] * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the model and figure functions for each calculation type and a range of sigmas")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs per benchmark")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="approximate length of each timed run")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    warm_model()
+    results = {}
+    print(f"{'Benchmark':<52}{'median (us)':>14}{'min (us)':>12}")
+    for name, function in benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = time_call(function, args.repeat, args.min_seconds)
+        print(f"{name:<52}{results[name]['median_us']:>14.1f}{results[name]['min_us']:>12.1f}")
+    if args.json:
+        write_results(args.json, "microbenchmarks", results, mu=mu, repeat=args.repeat, min_seconds=args.min_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Startup time report - where import time goes when the app starts and how long it takes from process start to the first served layout
+# Run from the 3_NOR directory: python benchmarks/startup_report.py [--top 15] [--json startup.json]
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports the app and requests the layout, printing seconds since interpreter start for each step
+first_layout_script = """
+import time
+start = time.perf_counter()
+import nor_controller
+imported = time.perf_counter()
+response = nor_controller.app.server.test_client().get("/_dash-layout")
+served = time.perf_counter()
+assert response.status_code == 200
+print(imported - start, served - start)
+"""
+
+
+# Self import time in seconds of each top level package when importing nor_controller, from python -X importtime
+def import_times():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import nor_controller"],
+                            cwd=app_dir, capture_output=True, text=True, check=True)
+    totals = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue
+        package = fields[2].strip().split(".")[0]
+        totals[package] += int(fields[0]) / 1e6
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+# Median seconds to import the app and to serve the first layout, over fresh interpreters
+def first_layout_times(repeat):
+    imported, served = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", first_layout_script],
+                                cwd=app_dir, capture_output=True, text=True, check=True)
+        import_seconds, served_seconds = map(float, result.stdout.split())
+        imported.append(import_seconds)
+        served.append(served_seconds)
+    return sorted(imported)[repeat // 2], sorted(served)[repeat // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report app import time by package and time to first served layout")
+    parser.add_argument("--top", type=int, default=15, help="number of packages to list")
+    parser.add_argument("--repeat", type=int, default=5, help="number of fresh interpreters to time")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    packages = import_times()
+    import_seconds, served_seconds = first_layout_times(args.repeat)
+    print(f"{'Package':<30}{'Import (ms)':>12}")
+    for package, seconds in list(packages.items())[:args.top]:
+        print(f"{package:<30}{seconds * 1000:>12.1f}")
+    print(f"\nImport nor_controller: {import_seconds * 1000:.1f} ms (median of {args.repeat})")
+    print(f"First layout served:   {served_seconds * 1000:.1f} ms (median of {args.repeat})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"import_seconds": import_seconds,
+                       "first_layout_seconds": served_seconds,
+                       "package_import_seconds": packages}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import re
+
+# workload puts the app directory on sys.path, so it is imported before the app modules
+from workload import update_graph_payload, write_results
+from nor_controller import app, warm_caches
+
+# Bytes on the wire for the page load and callback responses, uncompressed (as served before compression was enabled) and with gzip and Brotli negotiated,
+# and for a repeat visit - revalidating the index page and layout (304 Not Modified) and skipping fingerprinted resources, which are cached as immutable
+# Run from the 3_NOR directory after python nor_build.py (for the precompressed assets): python benchmarks/wire_bytes.py [--json wire.json]
+# Sizes are response headers plus body, measured through the Flask test client
+
+encodings = {"identity": "identity", "gzip": "gzip", "br": "br, gzip"}
+
+
+# Size of a response as sent - status line and headers plus body
+def wire_size(response):
+    headers = sum(len(f"{name}: {value}\r\n") for name, value in response.headers.items())
+    return len(f"HTTP/1.1 {response.status}\r\n") + headers + 2 + len(response.get_data())
+
+
+# Same-origin resources loaded with the index page - its scripts, stylesheets and favicon, and the fonts referenced by the asset stylesheets
+def page_resources(client, index_html):
+    urls = [url for url in dict.fromkeys(re.findall(r'(?:src|href)="(/[^"]+)"', index_html)) if url.startswith(("/assets/", "/_dash-component-suites/"))]
+    for url in [url for url in urls if url.startswith("/assets/") and url.split("?")[0].endswith(".css")]:
+        urls += ["/assets/" + path for path in re.findall(r'url\("?([^")]+)"?\)', client.get(url).get_data(as_text=True))]
+    return urls
+
+
+# Bytes for each request with each content coding, and for revalidating or reusing it on a repeat visit
+def measure(client, name, method, url, body=None):
+    result = {}
+    for encoding, accept_encoding in encodings.items():
+        headers = {"Accept-Encoding": accept_encoding}
+        if method == "GET":
+            response = client.get(url, headers=headers)
+        else:
+            response = client.post(url, data=json.dumps(body), content_type="application/json", headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"{name} returned {response.status_code}")
+        result[f"{encoding}_bytes"] = wire_size(response)
+    # Repeat visit with the Brotli response cached - immutable resources are not requested, others are revalidated with their ETag
+    if method == "GET":
+        if "immutable" in response.headers.get("Cache-Control", ""):
+            result["repeat_visit_bytes"] = 0
+        elif response.headers.get("ETag"):
+            revalidated = client.get(url, headers={"Accept-Encoding": encodings["br"], "If-None-Match": response.headers["ETag"]})
+            result["repeat_visit_bytes"] = wire_size(revalidated)
+    result["encoding"] = response.headers.get("Content-Encoding", "identity")
+    result["cache_control"] = response.headers.get("Cache-Control", "")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response bytes on the wire with and without compression and caching")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    warm_caches()
+    client = app.server.test_client()
+    requests = [("index", "GET", "/", None),
+                ("layout", "GET", "/_dash-layout", None),
+                ("dependencies", "GET", "/_dash-dependencies", None)]
+    requests += [(url.split("?")[0].rsplit("/", 1)[-1], "GET", url, None) for url in page_resources(client, client.get("/").get_data(as_text=True))]
+    requests += [("update_graph full", "POST", "/_dash-update-component", update_graph_payload(1.5, 2.5, "<>", 0.5, 3, None)),
+                 ("update_graph patch z", "POST", "/_dash-update-component", update_graph_payload(1.5, 2.5, "<>", 1, 3, {"mu": 1.5, "sigma": 2.5, "calc_type": "<>", "z1": 0.5, "z2": 3})),
+                 ("set_z_min_max", "POST", "/_dash-update-component", {"output": "..z1.min...z1.max...z2.min...z2.max..",
+                                                                       "outputs": [{"id": component_id, "property": prop} for component_id in ("z1", "z2") for prop in ("min", "max")],
+                                                                       "inputs": [{"id": "mu", "property": "value", "value": 1}, {"id": "sigma", "property": "value", "value": 2}],
+                                                                       "changedPropIds": ["mu.value"], "state": []})]
+
+    results = {}
+    print(f"{'Request':<44}{'identity':>10}{'gzip':>10}{'br':>10}{'repeat':>10}  Cache-Control")
+    for name, method, url, body in requests:
+        result = results[name] = measure(client, name, method, url, body)
+        repeat = result.get("repeat_visit_bytes")
+        print(f"{name[:43]:<44}{result['identity_bytes']:>10}{result['gzip_bytes']:>10}{result['br_bytes']:>10}{'' if repeat is None else repeat:>10}  {result['cache_control']}")
+    page = [result for name, result in results.items() if not name.startswith(("update_graph", "set_z_min_max"))]
+    totals = {"page load": {f"{encoding}_bytes": sum(result[f"{encoding}_bytes"] for result in page) for encoding in encodings}}
+    totals["page load"]["repeat_visit_bytes"] = sum(result.get("repeat_visit_bytes", result["br_bytes"]) for result in page)
+    for name, total in totals.items():
+        print(f"{'Total ' + name:<44}{total['identity_bytes']:>10}{total['gzip_bytes']:>10}{total['br_bytes']:>10}{total['repeat_visit_bytes']:>10}")
+    results.update({f"total {name}": total for name, total in totals.items()})
+    if args.json:
+        write_results(args.json, "wire_bytes", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# Shared inputs, request payloads and result files for the benchmark scripts (microbenchmarks.py, end_to_end.py, load_test.py)
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, app_dir)
+
+calc_types = ["<", ">", "<>", "><"]
+sigmas = [0.1, 1, 2.5, 15, 1000]
+
+# Weights of the kinds of update_graph request in the realistic input mix - classroom use is mostly the standard normal with textbook z values,
+# followed by edits of one input at a time (sent as a Patch against the graph on screen), with occasional new distributions and input errors
+request_mix = {"textbook": 0.4, "edit_z": 0.3, "edit_mu_sigma": 0.15, "new_distribution": 0.1, "invalid": 0.05}
+textbook_z = [0.5, 1, 1.5, 1.645, 1.96, 2, 2.33, 2.576, 3]
+
+
+# z1 (and z2) inside +/-3SD for a calculation type - for two sided types z1 < z2
+def random_z(rng, mu, sigma, calc_type):
+    if calc_type in ("<", ">"):
+        return round(mu + rng.uniform(-3, 3) * sigma, 2), None
+    z1, z2 = sorted(rng.uniform(-3, 3) for _ in range(2))
+    return round(mu + z1 * sigma, 2), round(mu + z2 * sigma, 2)
+
+
+# Seeded sequence of update_graph inputs (mu, sigma, calc_type, z1, z2, rendered) following request_mix, as one user session would send them -
+# rendered is the set of inputs the previous valid request drew (None at the start and after an input error)
+def input_mix(count, seed=0):
+    rng = random.Random(seed)
+    kinds, weights = zip(*request_mix.items())
+    rendered = None
+    requests = []
+    for kind in rng.choices(kinds, weights, k=count):
+        if kind == "textbook" or (rendered is None and kind in ("edit_z", "edit_mu_sigma")):
+            mu, sigma, calc_type = 0, 1, rng.choice(calc_types)
+            z = rng.choice(textbook_z)
+            z1, z2 = (rng.choice([-z, z]), None) if calc_type in ("<", ">") else (-z, z)
+        elif kind == "edit_z":
+            mu, sigma, calc_type = rendered["mu"], rendered["sigma"], rng.choice(calc_types)
+            z1, z2 = random_z(rng, mu, sigma, calc_type)
+        elif kind == "edit_mu_sigma" or kind == "new_distribution":
+            mu, sigma, calc_type = round(rng.uniform(-100, 100), 1), rng.choice(sigmas), rng.choice(calc_types)
+            z1, z2 = random_z(rng, mu, sigma, calc_type)
+            if kind == "new_distribution":
+                rendered = None
+        else:
+            # z1 greater than z2
+            mu, sigma, calc_type = 0, 1, rng.choice(["<>", "><"])
+            z1, z2 = 1, -1
+        requests.append((mu, sigma, calc_type, z1, z2, rendered))
+        rendered = None if kind == "invalid" else {"mu": mu, "sigma": sigma, "calc_type": calc_type, "z1": z1, "z2": z2}
+    return requests
+
+
+# Body of a POST to /_dash-update-component for the update_graph callback, as the browser sends it when Calculate is clicked - session is the value of the session-id store
+def update_graph_payload(mu, sigma, calc_type, z1, z2, rendered, n_clicks=1, session=None):
+    from nor_controller import update_graph_outputs
+    states = {"mu": mu, "sigma": sigma, "calc-type": calc_type, "z1": z1, "z2": z2, "rendered-inputs": rendered, "session-id": session}
+    return {"output": ".." + "...".join(str(output) for output in update_graph_outputs) + "..",
+            "outputs": [{"id": output.component_id, "property": output.component_property} for output in update_graph_outputs],
+            "inputs": [{"id": "submit", "property": "n_clicks", "value": n_clicks}],
+            "changedPropIds": ["submit.n_clicks"],
+            "state": [{"id": component_id, "property": "data" if component_id in ("rendered-inputs", "session-id") else "value", "value": value}
+                      for component_id, value in states.items()]}
+
+
+# Body of a POST to /_dash-update-component for the set_z_min_max callback, sent when mu or sigma is edited
+def set_z_min_max_payload(mu, sigma):
+    return {"output": "..z1.min...z1.max...z2.min...z2.max..",
+            "outputs": [{"id": component_id, "property": prop} for component_id in ("z1", "z2") for prop in ("min", "max")],
+            "inputs": [{"id": "mu", "property": "value", "value": mu}, {"id": "sigma", "property": "value", "value": sigma}],
+            "changedPropIds": ["mu.value"],
+            "state": []}
+
+
+# Median, tail quantiles and mean of a list of timings in seconds, in milliseconds
+def latency_summary(seconds):
+    values = sorted(seconds)
+    quantile = lambda q: values[min(int(q * len(values)), len(values) - 1)] * 1000
+    return {"count": len(values),
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": quantile(0.5),
+            "p95_ms": quantile(0.95),
+            "p99_ms": quantile(0.99),
+            "max_ms": values[-1] * 1000}
+
+
+# Commit and environment the results were measured on, so result files from different commits can be compared
+def run_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=app_dir, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()}
+
+
+# Write benchmark results keyed by benchmark name, with run_metadata, for benchmarks/compare.py
+def write_results(path, suite, results, **settings):
+    with open(path, "w") as f:
+        json.dump({"suite": suite, **run_metadata(), "settings": settings, "results": results}, f, indent=2)
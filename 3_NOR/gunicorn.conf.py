@@ -0,0 +1,16 @@
+import os
+
+# Gunicorn settings for production serving (gunicorn --config gunicorn.conf.py wsgi:server), each settable from an environment variable
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+# Worker processes, and threads per worker so one slow request does not block the others
+# Each worker has its own caches, session store and job pool, so the default is one worker per CPU this process may run on, at most 4 (2 where that is not known)
+# os.cpu_count() would count every CPU of the host inside a container, and neither it nor the affinity mask sees a container's CPU quota, so set NOR_WORKERS to match the quota
+usable_cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 2
+workers = int(os.environ.get("NOR_WORKERS", min(usable_cpus, 4)))
+threads = int(os.environ.get("NOR_THREADS", 4))
+worker_class = "gthread"
+# Seconds to hold idle keep-alive connections open, and before a silent worker is restarted
+keepalive = int(os.environ.get("NOR_KEEPALIVE", 5))
+timeout = int(os.environ.get("NOR_TIMEOUT", 30))
+# Import the app (and warm its caches) in the master before forking, so workers share those pages copy-on-write
+preload_app = True
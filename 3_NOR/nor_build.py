@@ -0,0 +1,41 @@
+import json
+import os
+from nor_figure import to_json
+from nor_model import create_blank_fig, normal_table_path, sampling_grid_data, write_normal_table
+from nor_http import precompressed_dir, write_precompressed_assets
+
+# Layout data that does not depend on user entry (blank figure and sampling grid) is serialized once at build time - run "python nor_build.py" (see Dockerfile)
+# nor_view reads it at import instead of building the blank figure with plotly, and falls back to building it when the file is missing
+# The build also writes the standard normal lookup table used for probabilities (see nor_model.normal_table_path) to assets/, where it is served as a static file,
+# and then Brotli and gzip versions of the assets to build/assets/ (see nor_http.py), served to browsers that accept them
+layout_data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build", "layout_data.json")
+
+
+# Build the blank figure and sampling grid data for the app layout
+def build_layout_data():
+    return {"blank_fig": json.loads(to_json(create_blank_fig())),
+            "sampling_grid": sampling_grid_data()}
+
+
+# Read precomputed layout data, building it if it has not been written
+def load_layout_data(path=layout_data_path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return build_layout_data()
+
+
+def write_layout_data(path=layout_data_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(build_layout_data(), f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    write_layout_data()
+    print(f"Wrote {layout_data_path}")
+    write_normal_table()
+    print(f"Wrote {normal_table_path}")
+    written = write_precompressed_assets()
+    print(f"Wrote {len(written)} precompressed assets to {precompressed_dir}")
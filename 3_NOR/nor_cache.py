@@ -0,0 +1,158 @@
+from collections import OrderedDict
+import sys
+import threading
+import time
+
+# Number of decimal places inputs are rounded to when used as cache keys - well below the precision shown in the app, so only float noise is merged
+key_precision = 6
+
+
+# Normalise user entry values (mu, sigma, calc_type, z1, z2) into a hashable cache key
+# Numbers are keyed with whether they are ints, as the results show 1 and 1.0 differently (and 1 == 1.0, so the rounded values alone would share a key)
+def cache_key(mu, sigma, calc_type, z1, z2):
+    return tuple(value if value is None or isinstance(value, str) else (isinstance(value, int), round(float(value), key_precision))
+                 for value in (mu, sigma, calc_type, z1, z2))
+
+
+# Approximate memory used by a cached value - strings and bytes are counted by length, NumPy arrays by their data, containers recursively
+def value_size(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if hasattr(value, "nbytes"):
+        return sys.getsizeof(0.0) + value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(value_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(value_size(k) + value_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+# Bounded, thread-safe least recently used cache with a memory budget in bytes and hit/miss counters
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    # Store a value, counted as size bytes of the memory budget (value_size(value) if size is None)
+    def put(self, key, value, size=None):
+        if size is None:
+            size = value_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # Evict least recently used entries until back within the memory budget
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {"entries": len(self._entries),
+                    "bytes": self._bytes,
+                    "max_bytes": self.max_bytes,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "hit_rate": self.hits / requests if requests else 0.0}
+
+
+# Bounded, thread-safe store of per-session values keyed by session id, with entries expiring ttl seconds after their last use
+# At most max_sessions sessions are kept (least recently used are evicted first) and a value over max_session_bytes is not stored
+# Each server worker process has its own store, so a session served by another worker starts empty
+class SessionStore:
+    def __init__(self, max_sessions, ttl, max_session_bytes):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_session_bytes = max_session_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    # Remove entries not used within ttl seconds - entries are ordered by last use, so expired entries are at the start
+    def _expire(self, now):
+        while self._entries:
+            session_id, (_, size, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.ttl:
+                break
+            del self._entries[session_id]
+            self._bytes -= size
+            self.expirations += 1
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[session_id] = (entry[0], entry[1], now)
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, session_id, value):
+        size = value_size(value)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if session_id in self._entries:
+                self._bytes -= self._entries.pop(session_id)[1]
+            if size > self.max_session_bytes:
+                return
+            self._entries[session_id] = (value, size, now)
+            self._bytes += size
+            while len(self._entries) > self.max_sessions:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            requests = self.hits + self.misses
+            return {"sessions": len(self._entries),
+                    "bytes": self._bytes,
+                    "max_sessions": self.max_sessions,
+                    "max_session_bytes": self.max_session_bytes,
+                    "ttl_seconds": self.ttl,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "expirations": self.expirations,
+                    "evictions": self.evictions,
+                    "hit_rate": self.hits / requests if requests else 0.0}
@@ -1,16 +1,28 @@
-from dash import Input, Output, State, exceptions, no_update
+from dash import ClientsideFunction, Input, Output, Patch, State, exceptions, no_update
+from flask import Response, g, jsonify, request
 import math
+import os
+import tempfile
+import time
 import numpy as np
-import plotly.graph_objects as go
-import scipy.stats as stat
-from nor_model import normal_distribution, calculate_probability_z1, calculate_probability_z1_z2, stat_colours
-from nor_view import app
+from nor_model import normal_distribution, normal_pdf, calculate_probability_z1, calculate_probability_z1_z2, stat_colours, warm_model, batch_probabilities, sweep_z1, overlay_distributions, \
+    empirical_rule_groups, empirical_rule_trace, empirical_rule_traces
+from nor_view import app, compression
+from nor_cache import LRUCache, SessionStore, cache_key, key_precision, value_size
+from nor_metrics import instrument, lap, metrics
+from nor_figure import default_template, figure, scatter, to_json
+from nor_jobs import JobRunner
+from nor_http import assets_dir, compress, compressible_mimetypes, encoded_etag, negotiate_encoding, precompressed_asset
+from nor_inputs import calc_types, is_number, is_session_id, normalise_distribution, normalise_inputs, normalise_z_values
 
 # app.callback Outputs and Inputs are all associated with unique elements in *_view.py though the first argument (component_id) and control/are controlled by the second argument (component_property)
 
 
-# Callback function to update normal distribution graph, results and associated screen reader text based on user entry values (mu (mean), sigma (standard deviation), z1, z2 and calculation type)
-@app.callback(
+# Rendering mode for the normal distribution graph - "server" (default) builds the figure in update_graph, "client" builds it in the browser with assets/nor_clientside.js
+# update_graph is kept as the server-side fallback and is registered whenever the client-side path is not selected
+render_mode = os.environ.get("NOR_RENDER_MODE", "server")
+
+update_graph_outputs = [
     # Graph
     Output("normal-dist-fig", "figure"),
     Output("sr-norm", "children"),
@@ -18,164 +30,496 @@ from nor_view import app
     Output("z1", "invalid"),
     Output("z2", "invalid"),
     Output("error", "children"),
+    # Input validation for the mean and standard deviation
+    Output("mu", "invalid"),
+    Output("sigma", "invalid"),
+    Output("distribution-error", "children"),
     # Results hidden until callback triggered
     Output("results", "style"),
     # Results
     Output("current-mu", "children"),
     Output("current-sigma", "children"),
     Output("probability", "children"),
-    # Inputs
+    # Inputs the current graph was drawn from
+    Output("rendered-inputs", "data")
+]
+update_graph_inputs = [
     Input("submit", "n_clicks"),
     State("mu", "value"),
     State("sigma", "value"),
     State("calc-type", "value"),
     State("z1", "value"),
     State("z2", "value"),
+    State("rendered-inputs", "data")
+]
+
+# Number of shaded probability traces drawn for each calculation type - the graph traces are ordered base curve, shaded area(s), mean and +/-1/2/3SD lines
+num_shaded_traces = {"<": 1, ">": 1, "<>": 1, "><": 2}
+
+
+# Memoized graphs and results keyed by normalised user entry values, so repeated inputs are served without recomputing the figure
+# Entries hold the figure as built (see graph_entry), which is never modified once cached - update_graph returns it as is or takes traces from it for a Patch
+# Memory budget in bytes is set with the NOR_CACHE_MAX_BYTES environment variable
+graph_cache = LRUCache(int(os.environ.get("NOR_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+
+# Per-session state keyed by the session-id store in nor_view.py - the base curve and empirical rule traces of the last distribution drawn (see graph_base), so a submit
+# that keeps the mean and standard deviation (e.g. changing only the calculation type) only computes the shaded area. Bounded by NOR_SESSION_MAX sessions and
+# NOR_SESSION_MAX_BYTES per session, with sessions expiring NOR_SESSION_TTL seconds after their last submit
+session_store = SessionStore(int(os.environ.get("NOR_SESSION_MAX", 1000)),
+                             float(os.environ.get("NOR_SESSION_TTL", 30 * 60)),
+                             int(os.environ.get("NOR_SESSION_MAX_BYTES", 256 * 1024)))
+
+# Common classroom inputs (mu, sigma, calc_type, z1, z2) built into graph_cache by warm_caches
+warm_inputs = [(0, 1, "<", 1.96, None),
+               (0, 1, ">", 1.96, None),
+               (0, 1, "<", -1.96, None),
+               (0, 1, ">", -1.96, None),
+               (0, 1, "<", 1.645, None),
+               (0, 1, ">", 1.645, None),
+               (0, 1, "<>", -1.96, 1.96),
+               (0, 1, "><", -1.96, 1.96)]
+
+
+# Warm the model caches and graph_cache - called by wsgi.py before server workers are forked so they share the cached state copy-on-write
+def warm_caches():
+    warm_model()
+    for mu, sigma, calc_type, z1, z2 in warm_inputs:
+        graph_cache.put(cache_key(mu, sigma, calc_type, z1, z2), *graph_entry(*build_figure(mu, sigma, calc_type, z1, z2)))
+
+
+# Callback function to update normal distribution graph, results and associated screen reader text based on user entry values (mu (mean), sigma (standard deviation), z1, z2 and calculation type)
+# rendered is the set of inputs the graph currently on screen was drawn from (None for the blank graph or after an input error) - when it is available only the changed parts of the graph are sent as a Patch
+# session_id keys the session's entry in session_store (None before the session-id store is set)
+def update_graph(n_clicks, mu, sigma, calc_type, z1, z2, rendered, session_id=None):
+    if n_clicks is None or mu is None or sigma is None:
+        raise exceptions.PreventUpdate
+    # Reject or normalise the inputs before any numeric work - rendered is only trusted if it is a set of normalised inputs
+    inputs, input_error, invalid_input = normalise_inputs(mu, sigma, calc_type, z1, z2)
+    if input_error:
+        return no_update, "", *input_error_outputs(input_error, invalid_input), no_update, "", "", "", None
+    mu, sigma, calc_type, z1, z2 = inputs
+    if rendered is not None:
+        rendered_values = tuple(rendered.get(name) for name in ("mu", "sigma", "calc_type", "z1", "z2")) if isinstance(rendered, dict) else None
+        if rendered_values is None or normalise_inputs(*rendered_values)[:2] != (rendered_values, None):
+            rendered = None
+    # A submit supersedes any background comparison the session is running
+    if is_session_id(session_id):
+        job_runner.cancel_session(session_id)
+    lap("validate")
+    key = cache_key(mu, sigma, calc_type, z1, z2)
+    cached = graph_cache.get(key)
+    lap("cache")
+    if cached is None:
+        # Reuse the session's base curve and empirical rule traces if the distribution is unchanged
+        session = session_store.get(session_id) if is_session_id(session_id) else None
+        reused = session is not None and session["mu"] == mu and session["sigma"] == sigma
+        if reused:
+            base = session["base"]
+        else:
+            base = graph_base(mu, sigma)
+            if is_session_id(session_id):
+                session_store.put(session_id, {"mu": mu, "sigma": sigma, "base": base})
+        metrics.increment("nor_session_base_total", help_text="Graphs built on a graph_cache miss, by whether the session's base curve was reused", reused=str(reused).lower())
+        lap("session")
+        full_figure, outputs, valid = build_figure(mu, sigma, calc_type, z1, z2, base)
+        graph_cache.put(key, *graph_entry(full_figure, outputs, valid))
+        lap("cache")
+    else:
+        full_figure, outputs, valid = cached
+    sr_norm, z1_invalid, z2_invalid, error, results_style, current_mu, current_sigma, probability = outputs
+    if not valid:
+        return full_figure, sr_norm, z1_invalid, z2_invalid, error, False, False, "", no_update, current_mu, current_sigma, probability, None
+    current = {"mu": mu, "sigma": sigma, "calc_type": calc_type, "z1": z1, "z2": z2}
+    if rendered is None:
+        # Nothing to patch - send the full graph
+        fig = full_figure
+    elif cache_key(**rendered) == key:
+        fig = no_update
+    else:
+        fig = Patch()
+        # Replace the shaded probability trace(s)
+        num_shaded = num_shaded_traces[calc_type]
+        for _ in range(num_shaded_traces[rendered["calc_type"]]):
+            del fig["data"][1]
+        for i, trace in enumerate(full_figure["data"][1:1 + num_shaded]):
+            fig["data"].insert(1 + i, trace)
+        # Move the base curve and the mean and +/-1/2/3SD lines in place
+        if rendered["mu"] != mu or rendered["sigma"] != sigma:
+            fig["layout"]["xaxis"]["dtick"] = full_figure["layout"]["xaxis"]["dtick"]
+            for i, trace in enumerate(full_figure["data"]):
+                if i == 0 or i > num_shaded:
+                    fig["data"][i]["x"] = trace["x"]
+                    fig["data"][i]["y"] = trace["y"]
+    lap("patch")
+    return fig, sr_norm, z1_invalid, z2_invalid, error, False, False, "", results_style, current_mu, current_sigma, probability, current
+
+
+# Validation outputs of update_graph (z1 and z2 invalid, error, mu and sigma invalid and the distribution error) for an input rejected by normalise_inputs
+# A mean or standard deviation error is shown under those inputs - any other error under z1 and z2, which depend on the calculation type
+def input_error_outputs(error, invalid_input):
+    if invalid_input in ("mu", "sigma"):
+        return False, False, "", invalid_input == "mu", invalid_input == "sigma", error
+    return True, True, error, False, False, ""
+
+
+# Build the full normal distribution graph and results for user entry values (mu (mean), sigma (standard deviation), z1, z2 and calculation type)
+# Returns the serialized figure, the remaining graph and results outputs (results style is None when it should not be updated) and whether the inputs were valid
+def build_graph(mu, sigma, calc_type, z1, z2):
+    fig, outputs, valid = build_figure(mu, sigma, calc_type, z1, z2)
+    return serialize_figure(fig), outputs, valid
+
+
+# build_graph returning the figure unserialized, from the base curve and empirical rule traces given by graph_base (built if base is None)
+def build_figure(mu, sigma, calc_type, z1, z2, base=None):
+    if base is None:
+        base = graph_base(mu, sigma)
+    # Input validation for z1 and z2 - the base normal distribution graph is drawn without results
+    if calc_type == "<" or calc_type == ">":
+        if z1 is None:
+            return base_figure(mu, sigma, base), ("", True, False, "Enter a value for z1", None, "", "", ""), False
+    elif calc_type == "<>" or calc_type == "><":
+        if z1 is None or z2 is None:
+            return base_figure(mu, sigma, base), ("", True, True, "Enter values for z1 and z2", None, "", "", ""), False
+        if z1 > z2:
+            return base_figure(mu, sigma, base), ("", True, True, "z1 must be less than z2", None, "", "", ""), False
+    # Add graph trace for Z < z1 or Z > z1
+    if calc_type == "<":
+        probability, prob_less_than_x1, norm_pdf = calculate_probability_z1(mu, sigma, z1, calc_type)
+        lap("model")
+        shaded = [
+            scatter(x=prob_less_than_x1,
+                    y=norm_pdf,
+                    name="Probability",
+                    marker={"color": stat_colours["norm"]},
+                    fill="tozeroy",
+                    fillcolor=stat_colours["z"],
+                    hoveron="fills")]
+        lap("figure")
+        # Screen reader text
+        sr_norm = f"Normal distribution graph with mean {mu}, standard deviation {sigma} and probability that Z is less than {z1} of {probability}%"
+    elif calc_type == ">":
+        probability, prob_greater_than_x1, norm_pdf = calculate_probability_z1(mu, sigma, z1, calc_type)
+        lap("model")
+        shaded = [
+            scatter(x=prob_greater_than_x1,
+                    y=norm_pdf,
+                    name="Probability",
+                    marker={"color": stat_colours["norm"]},
+                    fill="tozeroy",
+                    fillcolor=stat_colours["z"])]
+        lap("figure")
+        # Screen reader text
+        sr_norm = f"Normal distribution graph with mean {mu}, standard deviation {sigma} and probability that Z is greater than {z1} of {probability}%"
+    # Add graph trace(s) for z1 < Z < z2 or Z < z1 and Z > z2
+    elif calc_type == "<>":
+        probability, prob_between_x1_x2, norm_pdf = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
+        lap("model")
+        shaded = [
+            scatter(x=prob_between_x1_x2,
+                    y=norm_pdf,
+                    name="Probability",
+                    marker={"color": stat_colours["norm"]},
+                    fill="tozeroy",
+                    fillcolor=stat_colours["z"])]
+        lap("figure")
+        # Screen reader text
+        sr_norm = f"Normal distribution with mean {mu}, standard deviation {sigma}, and probability that Z is between {z1} and {z2} of {probability}%"
+    elif calc_type == "><":
+        probability, prob_less_than_x1, prob_greater_than_x2, norm_pdf1, norm_pdf2 = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
+        lap("model")
+        shaded = [
+            scatter(x=prob_less_than_x1,
+                    y=norm_pdf1,
+                    name="Probability",
+                    marker={"color": stat_colours["norm"]},
+                    fill="tozeroy",
+                    fillcolor=stat_colours["z"]),
+            scatter(x=prob_greater_than_x2,
+                    y=norm_pdf2,
+                    marker={"color": stat_colours["norm"]},
+                    fill="tozeroy",
+                    fillcolor=stat_colours["z"],
+                    showlegend=False)]
+        lap("figure")
+        # Screen reader text
+        sr_norm = f"Normal distribution with mean {mu}, standard deviation {sigma}, and probability that Z is less than {z1} and greater than {z2} of {probability}%"
+    fig = base_figure(mu, sigma, base)
+    fig["data"].extend(shaded)
+    empirical_rule(fig, mu, sigma, base[1])
+    lap("figure")
+    return fig, (sr_norm, False, False, "", {"display": "inline"}, f"{mu}", f"{sigma}", f"{probability}%"), True
+
+
+if render_mode == "client":
+    app.clientside_callback(
+        ClientsideFunction(namespace="nor", function_name="update_graph"),
+        *update_graph_outputs,
+        *update_graph_inputs,
+        # Current figure (for its template) and the standard sampling grid from nor_model
+        State("normal-dist-fig", "figure"),
+        State("sampling-grid", "data"),
+        prevent_initial_call=True
+    )
+else:
+    app.callback(*update_graph_outputs, *update_graph_inputs, State("session-id", "data"), prevent_initial_call=True)(instrument(update_graph))
+
+# Set the session id for this browser tab when the page loads (kept in sessionStorage, so it survives reloads) - used by update_graph and compare_graph
+app.clientside_callback(
+    ClientsideFunction(namespace="nor", function_name="session_id"),
+    Output("session-id", "data"),
+    Input("session-id", "modified_timestamp"),
+    State("session-id", "data")
+)
+
+
+# Parts of the graph for mean (mu) and standard deviation (sigma) user entry that do not depend on the calculation type, z1 or z2 - the base normal distribution trace
+# and the empirical rule traces. The traces are shared between figures (and held in session_store), so they are never modified
+def graph_base(mu, sigma):
+    x, norm_x = normal_distribution(mu, sigma)
+    lap("model")
+    base = (scatter(x=x,
+                    y=norm_x,
+                    dx=1,
+                    x0=-4,
+                    marker={"color": stat_colours["norm"]},
+                    name="Normal distribution",
+                    hoverinfo="skip"),
+            empirical_rule_traces(mu, sigma))
+    lap("figure")
+    return base
+
+
+# Create base normal distribution graph from mean (mu) and standard deviation (sigma) user entry, with the base trace from graph_base (built if base is None)
+def base_figure(mu, sigma, base=None):
+    if base is None:
+        base = graph_base(mu, sigma)
+    fig = figure(
+        [base[0]],
+        margin=dict(t=20, b=10, l=20, r=20),
+        height=400,
+        font={"size": 14},
+        xaxis={"dtick": math.ceil(sigma/2)})
+    lap("figure")
+    return fig
+
+
+# graph_cache entry for a figure and results from build_figure, and its size - the layout template is the same object in every figure, so only the traces and results are counted
+def graph_entry(fig, outputs, valid):
+    return (fig, outputs, valid), value_size((fig["data"], outputs))
+
+
+# Serialize a figure to JSON
+def serialize_figure(fig):
+    figure_json = to_json(fig)
+    lap("serialize")
+    return figure_json
+
+
+# Add graph lines for mean and +/-1/2/3SD for mean (mu) and standard deviation (sigma) user entry - one trace for the mean and one for each +/- pair
+# traces are the empirical rule traces from graph_base, if already built
+def empirical_rule(fig, mu, sigma, traces=None):
+    fig["data"].extend(empirical_rule_traces(mu, sigma) if traces is None else traces)
+    fig["layout"]["dragmode"] = False
+
+
+# Comparison mode - maximum number of overlaid distributions
+max_overlay_curves = 20
+
+
+# Parse the distributions to compare - one "mean, standard deviation" pair per line (or separated by semicolons)
+# Returns arrays of means and standard deviations, and an error message (None if the entry is valid)
+def parse_distributions(text):
+    pairs = [line.replace(",", " ").split() for line in (text or "").replace(";", "\n").splitlines() if line.strip()]
+    if len(pairs) < 1:
+        return None, None, "Enter a mean and standard deviation for each distribution to compare"
+    if len(pairs) > max_overlay_curves:
+        return None, None, f"Enter at most {max_overlay_curves} distributions to compare"
+    try:
+        values = [[float(value) for value in pair] for pair in pairs if len(pair) == 2]
+    except ValueError:
+        values = []
+    if len(values) != len(pairs):
+        return None, None, "Enter each distribution as a mean and standard deviation, e.g. 0, 1"
+    for k, (mu, sigma) in enumerate(values):
+        values[k][0], values[k][1], error = normalise_distribution(mu, sigma)
+        if error:
+            return None, None, f"Distribution {k + 1}: {error[0].lower()}{error[1:]}"
+    values = np.array(values)
+    return values[:, 0], values[:, 1], None
+
+
+# Legend name for an overlaid distribution
+def distribution_name(mu, sigma):
+    return f"Mean {mu:g}, SD {sigma:g}"
+
+
+# Add the empirical rule markers (mean and +/-1/2/3SD lines) for arrays of mean (mu) and standard deviation (sigma), as one trace per marker group (see empirical_rule_trace)
+# Heights come from one broadcast pdf evaluation; markers at the same position (to key_precision decimal places) are drawn once, to the tallest height, with a hover label naming every marker there
+def overlay_empirical_rule(fig, mu, sigma):
+    offsets = np.arange(-3, 4)
+    x = mu[:, None] + offsets * sigma[:, None]
+    height = normal_pdf(x, mu[:, None], sigma[:, None])
+    positions, first, inverse = np.unique(np.round(x.ravel(), key_precision), return_index=True, return_inverse=True)
+    labels = [[] for _ in positions]
+    for n, u in enumerate(inverse.ravel()):
+        k = offsets[n % len(offsets)]
+        label = f"{distribution_name(mu[n // len(offsets)], sigma[n // len(offsets)])} mean" + (f" {'+' if k > 0 else '-'} {abs(k)}SD" if k else "")
+        if label not in labels[u]:
+            labels[u].append(label)
+    top = np.zeros(len(positions))
+    np.maximum.at(top, inverse.ravel(), height.ravel())
+    group = np.full(len(positions), 3)
+    np.minimum.at(group, inverse.ravel(), np.abs(np.tile(offsets, len(mu))))
+    for k, name, colour in empirical_rule_groups:
+        members = np.flatnonzero(group == k)
+        if len(members):
+            fig["data"].append(empirical_rule_trace(x.ravel()[first[members]], top[members], ["<br>".join(labels[u]) for u in members], name, colour))
+
+
+# Overlay figure of normal curves for arrays of mean (mu) and standard deviation (sigma), each shaded for the calculation type, z1 and z2 (unshaded when calc_type is None)
+# Returns the figure and the probability for each curve
+def overlay_figure(mu, sigma, calc_type=None, z1=None, z2=None):
+    probability, curves, sections = overlay_distributions(mu, sigma, calc_type, z1, z2)
+    colorway = default_template()["layout"]["colorway"]
+    fig = figure(
+        [scatter(x=x,
+                 y=y,
+                 marker={"color": colorway[k % len(colorway)]},
+                 name=distribution_name(mu[k], sigma[k]),
+                 legendgroup=str(k),
+                 hoverinfo="skip")
+         for k, (x, y) in enumerate(curves)],
+        margin=dict(t=20, b=10, l=20, r=20),
+        height=400,
+        font={"size": 14},
+        dragmode=False)
+    for k, curve_sections in enumerate(sections):
+        for x, y in curve_sections:
+            fig["data"].append(
+                scatter(x=x,
+                        y=y,
+                        marker={"color": colorway[k % len(colorway)]},
+                        fill="tozeroy",
+                        name=f"{distribution_name(mu[k], sigma[k])} probability {probability[k]}%",
+                        legendgroup=str(k),
+                        showlegend=False))
+    overlay_empirical_rule(fig, mu, sigma)
+    return fig, probability
+
+
+# Background jobs (see nor_jobs.py) - comparisons of at least NOR_BACKGROUND_MIN_CURVES distributions are computed in a process pool instead of the request thread,
+# with at most NOR_MAX_JOBS jobs running at once in each server worker. Job files are kept in NOR_JOB_DIR (shared by the workers) for up to NOR_JOB_TTL seconds
+background_min_curves = int(os.environ.get("NOR_BACKGROUND_MIN_CURVES", 8))
+job_runner = JobRunner(os.environ.get("NOR_JOB_DIR", os.path.join(tempfile.gettempdir(), "nor-jobs")),
+                       int(os.environ.get("NOR_MAX_JOBS", 2)),
+                       float(os.environ.get("NOR_JOB_TTL", 10 * 60)))
+
+compare_outputs = [
+    *[Output(output.component_id, output.component_property, allow_duplicate=True) for output in update_graph_outputs],
+    Output("compare-distributions", "invalid", allow_duplicate=True),
+    Output("compare-error", "children", allow_duplicate=True)
+]
+# Background job being polled, and its progress bar
+job_outputs = [
+    Output("job", "data", allow_duplicate=True),
+    Output("job-poll", "disabled", allow_duplicate=True),
+    Output("job-progress", "value", allow_duplicate=True),
+    Output("job-progress", "label", allow_duplicate=True),
+    Output("job-progress", "style", allow_duplicate=True)
+]
+# job_outputs values with no job running
+no_job = (None, True, 0, "", {"display": "none"})
+
+
+# Callback function to overlay the distributions entered for comparison, each shaded with its probability for the selected calculation type, z1 and z2
+# Updates the same graph and results as update_graph, and clears the rendered inputs so the next Submit sends a full graph
+# At least background_min_curves shaded distributions are computed as a background job (see compare_job), polled by poll_job - any earlier job for the session is cancelled
+@app.callback(
+    *compare_outputs,
+    *job_outputs,
+    Input("compare", "n_clicks"),
+    State("compare-distributions", "value"),
+    State("calc-type", "value"),
+    State("z1", "value"),
+    State("z2", "value"),
+    State("session-id", "data"),
     prevent_initial_call=True
 )
-def update_graph(n_clicks, mu, sigma, calc_type, z1, z2):
-    if n_clicks is None or mu is None or sigma is None:
+@instrument
+def compare_graph(n_clicks, distributions, calc_type, z1, z2, session_id=None):
+    if not n_clicks:
         raise exceptions.PreventUpdate
+    session_id = session_id if is_session_id(session_id) else None
+    mu, sigma, distributions_error = parse_distributions(distributions)
+    if distributions_error:
+        return (no_update,) * 13 + (True, distributions_error) + (no_update,) * 5
+    if session_id is not None:
+        job_runner.cancel_session(session_id)
+    z_values, input_error = normalise_z_values(calc_type, z1, z2) if calc_type in calc_types else (None, "Select a calculation type")
+    if input_error:
+        return (no_update, "", True, True, input_error, False, False, "", no_update, "", "", "", None, False, "") + no_job
+    z1, z2 = z_values
+    # Input validation for z1 and z2 as in build_graph - the distributions are drawn without shading or results
+    if calc_type in ("<", ">") and z1 is None:
+        z_error = (True, False, "Enter a value for z1")
+    elif calc_type in ("<>", "><") and (z1 is None or z2 is None):
+        z_error = (True, True, "Enter values for z1 and z2")
+    elif calc_type in ("<>", "><") and z1 > z2:
+        z_error = (True, True, "z1 must be less than z2")
     else:
-        # Create base normal distribution graph from mean (mu) and standard deviation (sigma) user entry 
-        x, norm_x = normal_distribution(mu, sigma)
-        fig = go.Figure(
-            go.Scatter(x=x,
-                       y=norm_x,
-                       dx=1,
-                       x0=-4,
-                       marker_color=stat_colours["norm"],
-                       name="Normal distribution",
-                       hoverinfo="skip"),
-            layout={"margin": dict(t=20, b=10, l=20, r=20),
-                    "height": 400,
-                    "font_size": 14})
-        fig.update_xaxes(dtick=math.ceil(sigma/2))
-        # Add graph trace for Z < z1 or Z > z1
-        if calc_type == "<" or calc_type == ">":
-            # Input validation for z1
-            if z1 is None:
-                return fig, "", True, False, "Enter a value for z1", no_update, "", "", ""
-            else:
-                if calc_type == "<":
-                    probability, prob_less_than_x1, norm_pdf = calculate_probability_z1(mu, sigma, z1, calc_type)
-                    fig.add_trace(
-                        go.Scatter(x=prob_less_than_x1,
-                                   y=norm_pdf,
-                                   name="Probability",
-                                   marker_color=stat_colours["norm"],
-                                   fill="tozeroy",
-                                   fillcolor=stat_colours["z"],
-                                   hoveron="fills"))
-                    empirical_rule(fig, mu, sigma, norm_x)
-                    # Screen reader text
-                    sr_norm = f"Normal distribution graph with mean {mu}, standard deviation {sigma} and probability that Z is less than {z1} of {probability}%"
-                elif calc_type == ">":
-                    probability, prob_greater_than_x1, norm_pdf = calculate_probability_z1(mu, sigma, z1, calc_type)
-                    fig.add_trace(
-                        go.Scatter(x=prob_greater_than_x1,
-                                   y=norm_pdf,
-                                   name="Probability",
-                                   marker_color=stat_colours["norm"],
-                                   fill="tozeroy",
-                                   fillcolor=stat_colours["z"]))
-                    empirical_rule(fig, mu, sigma, norm_x)
-                                        # Screen reader text
-                    sr_norm = f"Normal distribution graph with mean {mu}, standard deviation {sigma} and probability that Z is greater than {z1} of {probability}%"
-        # Add graph trace(s) for z1 < Z < z2 or Z < z1 and Z > z2
-        elif calc_type == "<>" or calc_type == "><":
-            # Input validation for z1 and z2
-            if z1 is None or z2 is None:
-                return fig, "", True, True, "Enter values for z1 and z2", no_update, "", "", ""
-            if z1 > z2:
-                return fig, "", True, True, "z1 must be less than z2", no_update, "", "", ""
-            else:
-                if calc_type == "<>":
-                    probability, prob_between_x1_x2, norm_pdf = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
-                    fig.add_trace(
-                        go.Scatter(x=prob_between_x1_x2,
-                                   y=norm_pdf,
-                                   name="Probability",
-                                   marker_color=stat_colours["norm"],
-                                   fill="tozeroy",
-                                   fillcolor=stat_colours["z"]))
-                    empirical_rule(fig, mu, sigma, norm_x)
-                    # Screen reader text
-                    sr_norm = f"Normal distribution with mean {mu}, standard deviation {sigma}, and probability that Z is between {z1} and {z2} of {probability}%"
-                elif calc_type == "><":
-                    probability, prob_less_than_x1, prob_greater_than_x2, norm_pdf1, norm_pdf2 = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
-                    fig.add_trace(
-                        go.Scatter(x=prob_less_than_x1,
-                                   y=norm_pdf1,
-                                   name="Probability",
-                                   marker_color=stat_colours["norm"],
-                                   fill="tozeroy",
-                                   fillcolor=stat_colours["z"]))
-                    fig.add_trace(
-                        go.Scatter(x=prob_greater_than_x2,
-                                   y=norm_pdf2,
-                                   marker_color=stat_colours["norm"],
-                                   fill="tozeroy",
-                                   fillcolor=stat_colours["z"],
-                                   showlegend=False))
-                    empirical_rule(fig, mu, sigma, norm_x)
-                    # Screen reader text
-                    sr_norm = f"Normal distribution with mean {mu}, standard deviation {sigma}, and probability that Z is less than {z1} and greater than {z2} of {probability}%"
-    return fig, sr_norm, False, False, "", {"display": "inline"}, f"{mu}", f"{sigma}", f"{probability}%"
-
-
-# Add graph lines for mean and +/-1/2/3SD for mean (mu) and standard deviation (sigma) user entry
-def empirical_rule(fig, mu, sigma, norm_pdf):
-    fig.add_trace(
-        go.Scatter(x=[mu] * 10,
-                   y=np.linspace(0, max(norm_pdf), 10),
-                   name="Mean",
-                   marker_color=stat_colours["mean"],
-                   marker_opacity=0,
-                   hovertemplate="Mean: %{x:.3f}<extra></extra>"))
-    fig.add_trace(
-        go.Scatter(x=[sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(sigma + mu), 10),
-                   name=u"Mean \u00B1 1SD",
-                   marker_color=stat_colours["+-1std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 1SD: %{x:.3f}<extra></extra>"))
-    fig.add_trace(
-        go.Scatter(x=[-sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(sigma + mu), 10),
-                   marker_color=stat_colours["+-1std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 1SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    fig.add_trace(
-        go.Scatter(x=[2*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(2*sigma + mu), 10),
-                   name=u"Mean \u00B1 2SD",
-                   marker_color=stat_colours["+-2std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 2SD: %{x:.3f}<extra></extra>"))
-    fig.add_trace(
-        go.Scatter(x=[-2*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(2*sigma + mu), 10),
-                   marker_color=stat_colours["+-2std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 2SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    fig.add_trace(
-        go.Scatter(x=[3*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(3*sigma + mu), 10),
-                   name=u"Mean \u00B1 3SD",
-                   marker_color=stat_colours["+-3std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 3SD: %{x:.3f}<extra></extra>"))
-    fig.add_trace(
-        go.Scatter(x=[-3*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(3*sigma + mu), 10),
-                   marker_color=stat_colours["+-3std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 3SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    fig.update_layout(dragmode=False)
+        z_error = None
+    if z_error:
+        fig, _ = overlay_figure(mu, sigma)
+        return (fig, "", *z_error, False, False, "", no_update, "", "", "", None, False, "") + no_job
+    if len(mu) < background_min_curves:
+        return compare_results(mu, sigma, calc_type, z1, z2) + no_job
+    job_id = job_runner.submit(compare_job, (mu.tolist(), sigma.tolist(), calc_type, z1, z2), session_id)
+    if job_id is None:
+        return (no_update,) * 13 + (True, "The server is busy - try again in a moment") + no_job
+    return (no_update,) * 13 + (False, "") + ({"id": job_id}, False, 0, "Waiting to start", {"display": "flex"})
+
+
+# Graph and results outputs of compare_graph for arrays of mean (mu) and standard deviation (sigma), shaded for the calculation type, z1 and z2
+# progress is the progress function of a background job (see nor_jobs.py), if run as one
+def compare_results(mu, sigma, calc_type, z1, z2, progress=None):
+    fig, probability = overlay_figure(mu, sigma, calc_type, z1, z2)
+    if progress:
+        progress(0.7, "Building the graph")
+    condition = {"<": f"less than {z1}", ">": f"greater than {z1}", "<>": f"between {z1} and {z2}", "><": f"less than {z1} and greater than {z2}"}[calc_type]
+    # Screen reader text
+    sr_norm = "Normal distributions compared: " + "; ".join(f"mean {m:g} and standard deviation {s:g} with probability that Z is {condition} of {p}%" for m, s, p in zip(mu, sigma, probability))
+    return (fig, sr_norm, False, False, "", False, False, "", {"display": "inline"},
+            ", ".join(f"{m:g}" for m in mu), ", ".join(f"{s:g}" for s in sigma), ", ".join(f"{p}%" for p in probability), None, False, "")
+
+
+# Background job for compare_graph, run in a job_runner pool process - returns the compare_graph outputs as JSON
+def compare_job(mu, sigma, calc_type, z1, z2, progress):
+    progress(0.1, "Computing the distributions")
+    outputs = compare_results(np.array(mu), np.array(sigma), calc_type, z1, z2, progress)
+    progress(0.9, "Sending the graph")
+    return to_json(outputs)
+
+
+# Poll the background job started by compare_graph, showing its progress - when it finishes, the graph and results are updated with its outputs and polling stops
+@app.callback(
+    *compare_outputs,
+    *job_outputs,
+    Input("job-poll", "n_intervals"),
+    State("job", "data"),
+    prevent_initial_call=True
+)
+@instrument
+def poll_job(n_intervals, job):
+    status = job_runner.status(job["id"]) if isinstance(job, dict) and isinstance(job.get("id"), str) and job["id"].isalnum() else None
+    if status is None or status["status"] == "cancelled":
+        # Cancelled, superseded or expired
+        return (no_update,) * 15 + no_job
+    if status["status"] == "error":
+        return (no_update,) * 13 + (True, "The comparison could not be computed") + no_job
+    if status["status"] == "done":
+        outputs = job_runner.result(job["id"])
+        return (no_update,) * 15 + no_job if outputs is None else tuple(outputs) + no_job
+    return (no_update,) * 15 + (no_update, no_update, round(status["progress"] * 100), status["label"], no_update)
 
 
 # Set minimum and maximum values for z1 and z2 for mean (mu) and standard deviation (sigma) user entry - values entered outside this range do not generate meaningful results
@@ -188,6 +532,7 @@ def empirical_rule(fig, mu, sigma, norm_pdf):
     Input("sigma", "value"),
     suppress_callback_exceptions=True
 )
+@instrument
 def set_z_min_max(mu, sigma):
     if mu is None or sigma is None:
         raise exceptions.PreventUpdate
@@ -208,6 +553,7 @@ def set_z_min_max(mu, sigma):
     Input("calc-type", "value"),
     prevent_initial_call=True
 )
+@instrument
 def display_z_inputs(calc_type):
     if calc_type is None:
         raise exceptions.PreventUpdate
@@ -217,7 +563,263 @@ def display_z_inputs(calc_type):
         return False, True, True, False
 
 
+# Start the animated z1 sweep in the browser (assets/nor_clientside.js), streamed from /api/sweep - the graph is replaced, so the rendered inputs are cleared and the results hidden
+# Submit and Compare stop the sweep in progress
+app.clientside_callback(
+    ClientsideFunction(namespace="nor", function_name="sweep"),
+    Output("rendered-inputs", "data", allow_duplicate=True),
+    Output("sr-norm", "children", allow_duplicate=True),
+    Output("z2", "invalid", allow_duplicate=True),
+    Output("error", "children", allow_duplicate=True),
+    Output("mu", "invalid", allow_duplicate=True),
+    Output("sigma", "invalid", allow_duplicate=True),
+    Output("distribution-error", "children", allow_duplicate=True),
+    Output("results", "style", allow_duplicate=True),
+    Input("sweep", "n_clicks"),
+    Input("submit", "n_clicks"),
+    Input("compare", "n_clicks"),
+    State("mu", "value"),
+    State("sigma", "value"),
+    State("calc-type", "value"),
+    State("z2", "value"),
+    prevent_initial_call=True
+)
+
+
+# Size and hit/miss statistics for the memoized graph cache
+@app.server.route("/cache-stats")
+def cache_stats():
+    return jsonify(graph_cache.stats())
+
+
+# Live sessions, memory use and hit/miss/expiry statistics for the session store
+@app.server.route("/session-stats")
+def session_stats():
+    return jsonify(session_store.stats())
+
+
+# Batch probability API - POST JSON {"mu": [...], "sigma": [...], "calc_type": [...], "z1": [...], "z2": [...]}, where any field may be a single value applied to every query and z2 may be omitted for "<" and ">"
+# Returns {"probability": [...]} as percentages rounded to 2 decimal places, with null for queries with no probability (see batch_probabilities) - unlike the graph inputs,
+# the values are not limited, rounded or clamped by nor_inputs.py
+# With "log": true, returns {"log_probability": [...]} instead - the natural logs of the probabilities as fractions, which resolve tail probabilities far too small for a percentage
+# (a probability of 0 gives null, like a query with no probability)
+@app.server.route("/api/probabilities", methods=["POST"])
+def api_probabilities():
+    query = request.get_json(silent=True)
+    if not isinstance(query, dict):
+        return jsonify(error="Request body must be a JSON object"), 400
+    log = query.get("log", False)
+    if not isinstance(log, bool):
+        return jsonify(error="log must be true or false"), 400
+    try:
+        probabilities = batch_probabilities(query["mu"], query["sigma"], query["z1"], query.get("z2"), query["calc_type"], log=log)
+    except KeyError as e:
+        return jsonify(error=f"Missing field {e}"), 400
+    except (TypeError, ValueError) as e:
+        return jsonify(error=str(e)), 400
+    values = [p if math.isfinite(p) else None for p in probabilities.ravel().tolist()]
+    return jsonify(log_probability=values) if log else jsonify(probability=values)
+
+
+# Animated z1 sweep - number of steps (default and maximum) and the number of frames sent in each streamed chunk, set with the NOR_SWEEP_CHUNK_FRAMES environment variable
+sweep_steps = 81
+max_sweep_steps = 401
+sweep_chunk_frames = int(os.environ.get("NOR_SWEEP_CHUNK_FRAMES", 20))
+
+
+# Label showing z1 and the probability in each sweep frame
+def sweep_label(z1, probability):
+    return {"text": f"z1 = {round(float(z1), 4)}, probability {probability}%",
+            "xref": "paper",
+            "yref": "paper",
+            "x": 1,
+            "y": 1,
+            "xanchor": "right",
+            "yanchor": "top",
+            "showarrow": False}
+
+
+# Newline delimited JSON for the sweep - first the full graph at the start of the sweep, then chunks of plotly animation frames holding only the moving shaded trace and the label
+# Frames are built from sweep_z1 as each chunk is sent, so only one chunk is held in memory at a time
+def sweep_stream(mu, sigma, calc_type, z2, steps):
+    figure_json = build_graph(mu, sigma, calc_type, mu - 4*sigma, z2)[0]
+    yield '{"figure": ' + figure_json + '}\n'
+    frames = []
+    for k, (z1, probability, sections) in enumerate(sweep_z1(mu, sigma, calc_type, z2, steps)):
+        frames.append({"name": str(k),
+                       "data": [{"x": x, "y": y} for x, y in sections],
+                       "traces": list(range(1, 1 + len(sections))),
+                       "layout": {"annotations": [sweep_label(z1, probability)]}})
+        if len(frames) == sweep_chunk_frames or k == steps - 1:
+            yield to_json({"frames": frames}) + "\n"
+            frames = []
+
+
+# Animated sweep API - POST JSON {"mu": ..., "sigma": ..., "calc_type": ..., "z2": ..., "steps": ...}, where z2 is only used (and required) for "<>" and "><" and steps is optional
+# Streams sweep_stream as application/x-ndjson
+@app.server.route("/api/sweep", methods=["POST"])
+def api_sweep():
+    query = request.get_json(silent=True)
+    if not isinstance(query, dict):
+        return jsonify(error="Request body must be a JSON object"), 400
+    steps = query.get("steps", sweep_steps)
+    if not is_number(steps):
+        return jsonify(error="steps must be a number"), 400
+    inputs, input_error, _ = normalise_inputs(query.get("mu"), query.get("sigma"), query.get("calc_type"), None, query.get("z2"))
+    if input_error:
+        return jsonify(error=input_error), 400
+    mu, sigma, calc_type, _, z2 = inputs
+    if calc_type in ("<>", "><") and (z2 is None or z2 <= mu - 4*sigma):
+        return jsonify(error="z2 must be a number greater than mu - 4 sigma"), 400
+    steps = min(max(int(steps), 2), max_sweep_steps)
+    return Response(sweep_stream(mu, sigma, calc_type, z2, steps), mimetype="application/x-ndjson")
+
+
+# Time each callback request including Dash's response serialization, and record response sizes
+@app.server.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.server.after_request
+def record_callback_response(response):
+    if request.path.endswith("/_dash-update-component") and "request_start" in g:
+        output = (request.get_json(silent=True) or {}).get("output")
+        callback = app.callback_map.get(output, {}).get("callback")
+        name = callback.__name__ if callback else "unknown"
+        metrics.observe("nor_request_seconds", time.perf_counter() - g.request_start, "Callback request time in seconds, including response serialization", callback=name)
+        metrics.observe("nor_response_bytes", response.calculate_content_length() or 0, "Callback response size in bytes", callback=name)
+        metrics.increment("nor_requests_total", help_text="Callback requests by response status", callback=name, status=response.status_code)
+    return response
+
+
+# Static responses (assets and Dash component suites) compressed for each URL and content coding - assets from their precompressed versions written by nor_build.py,
+# and anything else compressed once on first request. Memory budget in bytes is set with the NOR_STATIC_CACHE_MAX_BYTES environment variable
+static_cache = LRUCache(int(os.environ.get("NOR_STATIC_CACHE_MAX_BYTES", 32 * 1024 * 1024)))
+# Cache lifetime in seconds for assets requested without their fingerprint (e.g. the fonts, referenced from style.css)
+asset_max_age = int(os.environ.get("NOR_ASSET_MAX_AGE", 60 * 60))
+# Brotli quality for static responses compressed on first request - the highest qualities take seconds for the plotly bundle
+static_brotli_quality = 9
+
+
+# Conditional requests for static responses are answered by compress_static, which knows the content coding each response is sent with - If-None-Match is kept
+# from Flask's and Dash's own checks, which compare it with the ETag of the uncompressed response
+@app.server.before_request
+def defer_static_conditional():
+    if request.path.startswith(("/assets/", "/_dash-component-suites/")):
+        g.if_none_match = request.environ.pop("HTTP_IF_NONE_MATCH", "")
+
+
+# Cache headers and compression for static responses - fingerprinted URLs (assets with the ?m= modification time Dash adds, and fingerprinted component suites) are cached
+# as immutable for a year, other assets for asset_max_age seconds and revalidated with their ETag. Runs before Flask-Compress, which leaves encoded responses alone
+# Only found assets are given cache headers, so a missing asset is not cached
+@app.server.after_request
+def compress_static(response):
+    if request.method != "GET" or not request.path.startswith(("/assets/", "/_dash-component-suites/")) or response.status_code != 200:
+        return response
+    if request.path.startswith("/assets/"):
+        asset_path = request.path[len("/assets/"):]
+        try:
+            modified = os.path.getmtime(os.path.join(assets_dir, asset_path))
+        except OSError:
+            modified = None
+        fingerprinted = modified is not None and request.args.get("m") == str(modified)
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000 if fingerprinted else asset_max_age
+        response.cache_control.immutable = fingerprinted
+    else:
+        asset_path, modified = None, None
+        # Dash gives fingerprinted component suites a one year max-age
+        response.cache_control.immutable = response.cache_control.max_age == 31536000
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None or not response.mimetype.startswith(compressible_mimetypes) or "Content-Encoding" in response.headers:
+        return not_modified(response, None) or response
+    key = (request.path, modified, encoding)
+    response.direct_passthrough = False
+    data = response.get_data()
+    compressed = static_cache.get(key)
+    if compressed is None:
+        compressed = precompressed_asset(asset_path, encoding) if asset_path is not None else None
+        if compressed is None:
+            compressed = compress(data, encoding, static_brotli_quality)
+        static_cache.put(key, compressed)
+    if len(compressed) >= len(data):
+        return not_modified(response, None) or response
+    unchanged = not_modified(response, encoding)
+    if unchanged:
+        return unchanged
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    etag = response.headers.get("ETag")
+    if etag:
+        response.headers["ETag"] = encoded_etag(etag, encoding)
+    return response
+
+
+# ETags for the index page, layout and callback dependencies, so a browser revalidating them is sent 304 Not Modified instead of the body - the ETag is compared as
+# Flask-Compress will send it, with the content coding it will compress the response with appended
+@app.server.after_request
+def conditional_layout(response):
+    if request.method != "GET" or request.path not in ("/", "/_dash-layout", "/_dash-dependencies") or response.status_code != 200:
+        return response
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return not_modified(response, compression_encoding(response)) or response
+
+
+# Content coding Flask-Compress will compress a response with (see nor_view.py), or None if it will send it uncompressed
+def compression_encoding(response):
+    config = app.server.config
+    if response.mimetype not in config["COMPRESS_MIMETYPES"] or "Content-Encoding" in response.headers or \
+            (response.content_length is not None and response.content_length < config["COMPRESS_MIN_SIZE"]):
+        return None
+    return compression._choose_compress_algorithm(request.headers.get("Accept-Encoding", ""))
+
+
+# 304 Not Modified response if the request's If-None-Match matches the ETag of the response sent with the given content coding (see encoded_etag) - otherwise None
+def not_modified(response, encoding):
+    etag = response.headers.get("ETag")
+    if etag is None:
+        return None
+    etag = encoded_etag(etag, encoding)
+    for candidate in g.get("if_none_match", request.headers.get("If-None-Match", "")).split(","):
+        if encoded_etag(candidate, None) == etag:
+            not_modified_response = Response(status=304)
+            not_modified_response.headers["ETag"] = etag
+            not_modified_response.headers["Cache-Control"] = response.headers.get("Cache-Control", "no-cache")
+            not_modified_response.vary.add("Accept-Encoding")
+            return not_modified_response
+    return None
+
+
+# Cache, session store and job statistics that only ever increase, exported as counters (<prefix>_<stat>_total) - the other statistics are sizes, limits and live counts, exported as gauges
+# Job outcomes are exported as one counter, nor_jobs_finished_total, labelled by outcome
+counter_stats = ("hits", "misses", "evictions", "expirations", "submitted", "rejected")
+job_outcome_stats = ("done", "cancelled", "error")
+
+
+# Callback timings, response sizes and request counts in the Prometheus text format, with the graph cache, session store, job and static cache statistics
+@app.server.route("/metrics")
+def prometheus_metrics():
+    cache_lines = []
+    for prefix, store in (("nor_graph_cache", graph_cache), ("nor_session_store", session_store), ("nor_jobs", job_runner), ("nor_static_cache", static_cache)):
+        stats = store.stats()
+        for stat, value in stats.items():
+            if stat in job_outcome_stats:
+                continue
+            name = f"{prefix}_{stat}_total" if stat in counter_stats else f"{prefix}_{stat}"
+            cache_lines.append(f"# TYPE {name} {'counter' if stat in counter_stats else 'gauge'}")
+            cache_lines.append(f"{name} {value}")
+        outcomes = [stat for stat in job_outcome_stats if stat in stats]
+        if outcomes:
+            cache_lines.append(f"# TYPE {prefix}_finished_total counter")
+            cache_lines.extend(f'{prefix}_finished_total{{outcome="{stat}"}} {stats[stat]}' for stat in outcomes)
+    return Response(metrics.render() + "\n".join(cache_lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     # app.run(debug=True)
-    # To deploy on Docker, replace app.run(debug=True) with the following:
+    # Development server only - production (including Docker) serves wsgi:server with gunicorn, see gunicorn.conf.py
     app.run(debug=False, host="0.0.0.0", port=8080, dev_tools_ui=False)
@@ -0,0 +1,27 @@
+from functools import lru_cache
+
+# Lightweight figure builder - figures are plain dicts (with NumPy arrays for trace data) laid out exactly as go.Figure(...).to_plotly_json() would produce,
+# skipping plotly's property validation and deep copies. Nested properties are given as dicts, e.g. marker={"color": ...} instead of marker_color=...
+
+
+# Default plotly.py template (plotly.io.templates.default), added to every figure layout as go.Figure does
+@lru_cache(maxsize=1)
+def default_template():
+    import plotly.io as pio
+    return pio.templates[pio.templates.default].to_plotly_json()
+
+
+# Scatter trace with x and y data and any other trace properties
+def scatter(x, y, **properties):
+    return {"x": x, "y": y, **properties, "type": "scatter"}
+
+
+# Figure from a list of traces and layout properties
+def figure(data, **layout):
+    return {"data": list(data), "layout": {**layout, "template": default_template()}}
+
+
+# Serialize a figure to JSON - uses orjson (with native NumPy array support) when it is installed, as plotly does
+def to_json(fig):
+    from plotly.io.json import to_json_plotly
+    return to_json_plotly(fig)
@@ -0,0 +1,82 @@
+import gzip
+import os
+import brotli
+from werkzeug.security import safe_join
+
+# HTTP delivery helpers - content coding negotiation and compression for static responses (assets and Dash component suites)
+# A static response never changes for a given URL, so it is compressed once at high quality (assets at build time by nor_build.py) rather than on every request
+# like callback responses, which are compressed by Flask-Compress (see nor_view.py)
+
+app_dir = os.path.dirname(os.path.abspath(__file__))
+assets_dir = os.path.join(app_dir, "assets")
+# Precompressed assets written by nor_build.py - assets/<path> is compressed to build/assets/<path>.br and build/assets/<path>.gz
+precompressed_dir = os.path.join(app_dir, "build", "assets")
+# Content codings for static responses in order of preference, with the file suffix of precompressed assets
+static_encodings = {"br": ".br", "gzip": ".gz"}
+# Types of asset worth compressing - formats that are already compressed (png, woff2) are not
+compressible_suffixes = (".css", ".js", ".json", ".map", ".svg", ".ttf", ".otf", ".ico", ".bin", ".txt", ".html")
+compressible_mimetypes = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/vnd.microsoft.icon", "image/x-icon", "font/ttf", "font/otf", "application/octet-stream")
+
+
+# Preferred content coding for a request's Accept-Encoding header from static_encodings ("br" or "gzip"), or None if neither is acceptable
+def negotiate_encoding(accept_encoding):
+    quality = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, parameters = part.partition(";")
+        parameters = parameters.strip()
+        try:
+            quality[coding.strip()] = float(parameters[2:]) if parameters.startswith("q=") else 1.0
+        except ValueError:
+            quality[coding.strip()] = 1.0
+    best = max(static_encodings, key=lambda coding: quality.get(coding, quality.get("*", 0)))
+    return best if quality.get(best, quality.get("*", 0)) > 0 else None
+
+
+# Compress data with a content coding from static_encodings - gzip output has no timestamp, so it is the same for the same data
+def compress(data, encoding, brotli_quality=11):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# Compress every compressible file in assets_dir to precompressed_dir with each of static_encodings, keeping only versions smaller than the original
+def write_precompressed_assets(source_dir=assets_dir, target_dir=precompressed_dir):
+    written = []
+    for current, _, files in os.walk(source_dir):
+        for name in files:
+            if not name.endswith(compressible_suffixes):
+                continue
+            with open(os.path.join(current, name), "rb") as f:
+                data = f.read()
+            target = os.path.join(target_dir, os.path.relpath(current, source_dir))
+            os.makedirs(target, exist_ok=True)
+            for encoding, suffix in static_encodings.items():
+                compressed = compress(data, encoding)
+                path = os.path.join(target, name + suffix)
+                if len(compressed) < len(data):
+                    with open(path, "wb") as f:
+                        f.write(compressed)
+                    written.append(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+    return written
+
+
+# Precompressed version of an asset (path relative to assets_dir) for a content coding, or None if there is none at least as new as the asset
+def precompressed_asset(path, encoding, source_dir=assets_dir, target_dir=precompressed_dir):
+    source = safe_join(source_dir, path)
+    compressed = safe_join(target_dir, path + static_encodings[encoding])
+    try:
+        if source is None or compressed is None or os.path.getmtime(compressed) < os.path.getmtime(source):
+            return None
+        with open(compressed, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+# ETag of a response sent with a content coding (None for none) - Flask-Compress, and compress_static in nor_controller.py, append the coding to the ETag of a compressed
+# response ("tag:br"), so each coding of a response has its own ETag
+def encoded_etag(etag, encoding):
+    etag = etag.strip().removeprefix("W/")
+    return f'{etag[:-1]}:{encoding}"' if encoding else etag
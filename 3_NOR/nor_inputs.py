@@ -0,0 +1,82 @@
+import math
+import re
+
+# Server-side validation and normalisation of user entry values (mu, sigma, calc_type, z1, z2), run before any numeric work
+# The min/max on the inputs in nor_view.py and set_z_min_max are only enforced by the browser, so a scripted client can send anything
+
+# Values are rounded to this many decimal places - enough for anything entered by hand, and it makes equivalent inputs identical (and so share a graph_cache entry)
+input_decimals = 4
+# Smallest standard deviation, as the min of the sigma input in nor_view.py
+sigma_min = 0.1
+# Largest magnitude accepted for mu, sigma, z1 and z2
+value_max = 1e6
+# z1 and z2 are clamped to mu +/- z_range * sigma, the range set by set_z_min_max
+z_range = 4
+calc_types = ("<", ">", "<>", "><")
+
+
+# Round a number to input_decimals places, keeping integers as integers so they are displayed as entered
+# Returns None if value is not a finite number within +/-value_max
+def quantize(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not abs(value) <= value_max:
+        return None
+    if isinstance(value, int):
+        return value
+    # Adding 0.0 turns -0.0 into 0.0
+    return round(value, input_decimals) + 0.0
+
+
+# Validate and quantize a mean (mu) and standard deviation (sigma)
+# Returns (mu, sigma, error) - error is a message for the user, or None if the values are valid
+def normalise_distribution(mu, sigma):
+    mu, sigma = quantize(mu), quantize(sigma)
+    if mu is None:
+        return None, None, f"The mean must be a number between {-value_max:,.0f} and {value_max:,.0f}"
+    if sigma is None or sigma < sigma_min:
+        return None, None, f"The standard deviation must be a number between {sigma_min:g} and {value_max:,.0f}"
+    return mu, sigma, None
+
+
+# Validate and quantize z1 and z2 for a calculation type, clamping them to [low, high] - z2 is set to None for "<" and ">", which do not use it
+# Missing values (None) are passed through, to be reported by build_graph. Returns ((z1, z2), error) - error is a message for the user, or None if the values are valid
+def normalise_z_values(calc_type, z1, z2, low=-value_max, high=value_max):
+    if calc_type in ("<", ">"):
+        z2 = None
+    z_values = []
+    for name, z in (("z1", z1), ("z2", z2)):
+        if z is not None:
+            z = quantize(z)
+            if z is None:
+                return None, f"{name} must be a number between {-value_max:,.0f} and {value_max:,.0f}"
+            clamped = min(max(z, low), high)
+            if clamped != z:
+                z = quantize(clamped)
+        z_values.append(z)
+    return tuple(z_values), None
+
+
+# Validate and normalise user entry values for the graph before they reach the model or graph_cache - mu and sigma as normalise_distribution, calc_type must be one of calc_types,
+# and z1 and z2 are normalised by normalise_z_values and clamped to mu +/- z_range * sigma
+# Returns ((mu, sigma, calc_type, z1, z2), error, invalid) - error is a message for the user, or None if the values are valid, and invalid is the input it is for
+# ("calc_type", "mu", "sigma" or "z" for z1 and z2)
+def normalise_inputs(mu, sigma, calc_type, z1, z2):
+    if calc_type not in calc_types:
+        return None, "Select a calculation type", "calc_type"
+    normalised_mu, normalised_sigma, error = normalise_distribution(mu, sigma)
+    if error:
+        return None, error, "mu" if quantize(mu) is None else "sigma"
+    mu, sigma = normalised_mu, normalised_sigma
+    z_values, error = normalise_z_values(calc_type, z1, z2, mu - z_range * sigma, mu + z_range * sigma)
+    if error:
+        return None, error, "z"
+    return (mu, sigma, calc_type, *z_values), None, None
+
+
+# True if a value is a finite number (booleans excluded) - for checks that do not quantize, such as counts
+def is_number(value):
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and abs(value) < math.inf
+
+
+# True if a value is a usable session id (see the session-id store in nor_view.py) - up to 64 letters, digits and hyphens, as generated by assets/nor_clientside.js
+def is_session_id(value):
+    return isinstance(value, str) and re.fullmatch(r"[0-9A-Za-z-]{1,64}", value) is not None
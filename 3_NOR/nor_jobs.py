@@ -0,0 +1,199 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+# Background jobs for requests too heavy to run in a server thread - each job runs in a local process pool, and its state, progress and result are kept as files
+# in a job directory, so any server worker (not only the one that started it) can report on it or cancel it
+# Pool processes are started with forkserver (spawn where it is not available), not fork - a fork from a threaded server worker copies locks held by its other threads,
+# which can deadlock the child. The job function is pickled by reference, so it must be defined at module level
+# Files for job <id>: <id>.json (status, progress and label), <id>.result.json (the job function's return value) and <id>.cancel (written to cancel the job);
+# session-<session id> holds the id of the session's latest job, so a new job cancels the one it supersedes
+
+
+# Raised by the progress function of a job that has been cancelled - job functions can let it propagate
+class JobCancelled(Exception):
+    pass
+
+
+# Write text to a file atomically, so a reader never sees a partly written file
+def _write_text(path, text):
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(text)
+    os.replace(temporary_path, path)
+
+
+def _write_json(path, data):
+    _write_text(path, json.dumps(data, separators=(",", ":")))
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+# Run a job function in a pool process, passing it a progress function that records progress (a fraction from 0 to 1) and a label for the user,
+# and raises JobCancelled once the job has been cancelled
+def _run_job(job_dir, job_id, function, args):
+    status_path = os.path.join(job_dir, f"{job_id}.json")
+    cancel_path = os.path.join(job_dir, f"{job_id}.cancel")
+
+    def progress(fraction, label=""):
+        if os.path.exists(cancel_path):
+            raise JobCancelled
+        _write_json(status_path, {"status": "running", "progress": fraction, "label": label})
+
+    try:
+        progress(0, "Starting")
+        result = function(*args, progress=progress)
+        result_path = os.path.join(job_dir, f"{job_id}.result.json")
+        if isinstance(result, str):
+            _write_text(result_path, result)
+        else:
+            _write_json(result_path, result)
+        _write_json(status_path, {"status": "done", "progress": 1, "label": "Done"})
+        return "done"
+    except JobCancelled:
+        _write_json(status_path, {"status": "cancelled", "progress": 0, "label": "Cancelled"})
+        return "cancelled"
+    except Exception as e:
+        _write_json(status_path, {"status": "error", "progress": 0, "label": f"{type(e).__name__}: {e}"})
+        return "error"
+
+
+# Background job runner with a disk job store in job_dir - at most max_jobs jobs run at once in each server worker process (each worker has its own pool, created on first use),
+# and job files are removed ttl seconds after they were last written
+class JobRunner:
+    def __init__(self, job_dir, max_jobs, ttl):
+        self.job_dir = job_dir
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        self._active = {}
+        self.submitted = 0
+        self.rejected = 0
+        self.outcomes = {"done": 0, "cancelled": 0, "error": 0}
+
+    def _path(self, name):
+        return os.path.join(self.job_dir, name)
+
+    # Process pool for this process - a pool is never shared with a forked child, so one is created after the fork in each server worker
+    def _executor(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(max_workers=self.max_jobs, mp_context=multiprocessing.get_context(start_method))
+            self._pool_pid = os.getpid()
+            self._active = {}
+        return self._pool
+
+    # Count a finished job's outcome - a job whose pool process died (e.g. killed when out of memory) never wrote its final status, so it is reported as an error here
+    def _finished(self, job_id, future):
+        if future.cancelled():
+            with self._lock:
+                self._active.pop(job_id, None)
+            return
+        error = future.exception()
+        with self._lock:
+            self._active.pop(job_id, None)
+            self.outcomes["error" if error is not None else future.result()] += 1
+        if error is not None:
+            _write_json(self._path(f"{job_id}.json"), {"status": "error", "progress": 0, "label": f"{type(error).__name__}: {error}"})
+
+    # Remove job files not written within ttl seconds
+    def _remove_expired(self):
+        expiry = time.time() - self.ttl
+        for entry in os.scandir(self.job_dir):
+            try:
+                if entry.stat().st_mtime < expiry:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    # Start function(*args, progress=progress) in the process pool, cancelling the session's previous job - the function returns a JSON serializable value, or a str of JSON
+    # Returns the job id, or None if max_jobs jobs are already running in this process
+    def submit(self, function, args, session_id=None):
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._remove_expired()
+        if session_id is not None:
+            self.cancel_session(session_id)
+        with self._lock:
+            executor = self._executor()
+            if len(self._active) >= self.max_jobs:
+                self.rejected += 1
+                return None
+            job_id = uuid.uuid4().hex
+            _write_json(self._path(f"{job_id}.json"), {"status": "queued", "progress": 0, "label": "Waiting to start"})
+            try:
+                future = executor.submit(_run_job, self.job_dir, job_id, function, args)
+            except BrokenProcessPool:
+                # A pool process died, which breaks the whole pool - its jobs have failed (see _finished), so start a new pool
+                self._pool = None
+                future = self._executor().submit(_run_job, self.job_dir, job_id, function, args)
+            self._active[job_id] = future
+            self.submitted += 1
+        future.add_done_callback(lambda future: self._finished(job_id, future))
+        if session_id is not None:
+            with open(self._path(f"session-{session_id}"), "w") as f:
+                f.write(job_id)
+        return job_id
+
+    # Status of a job - a dict of status ("queued", "running", "done", "cancelled" or "error"), progress and label, or None for an unknown (or expired) job
+    def status(self, job_id):
+        return _read_json(self._path(f"{job_id}.json"))
+
+    def _remove(self, job_id):
+        for suffix in (".json", ".result.json", ".cancel"):
+            try:
+                os.remove(self._path(f"{job_id}{suffix}"))
+            except FileNotFoundError:
+                pass
+
+    # Return value of a finished job (None until it is done), removing the job's files
+    def result(self, job_id):
+        result = _read_json(self._path(f"{job_id}.result.json"))
+        if result is not None:
+            self._remove(job_id)
+        return result
+
+    # Cancel a job - a queued job in this process is removed from the pool, a running job stops at its next progress update, and a finished job's result is discarded
+    def cancel(self, job_id):
+        status = self.status(job_id)
+        if status is None:
+            return
+        if status["status"] not in ("queued", "running"):
+            self._remove(job_id)
+            return
+        open(self._path(f"{job_id}.cancel"), "w").close()
+        with self._lock:
+            future = self._active.get(job_id)
+        if future is not None and future.cancel():
+            _write_json(self._path(f"{job_id}.json"), {"status": "cancelled", "progress": 0, "label": "Cancelled"})
+            with self._lock:
+                self.outcomes["cancelled"] += 1
+
+    # Cancel the latest job started for a session (see cancel)
+    def cancel_session(self, session_id):
+        try:
+            with open(self._path(f"session-{session_id}")) as f:
+                job_id = f.read()
+        except FileNotFoundError:
+            return
+        self.cancel(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {"active": len(self._active) if self._pool_pid == os.getpid() else 0,
+                    "max_jobs": self.max_jobs,
+                    "submitted": self.submitted,
+                    "rejected": self.rejected,
+                    **self.outcomes}
@@ -0,0 +1,135 @@
+from collections import defaultdict, deque
+import cProfile
+import functools
+import os
+import threading
+import time
+
+# Number of most recent observations kept per metric for the p50/p95/p99 quantiles
+window_size = 2048
+quantiles = (0.5, 0.95, 0.99)
+
+# When set, every instrumented callback call is profiled and the stats dumped to a .prof file in this directory
+profile_dir = os.environ.get("NOR_PROFILE_DIR")
+
+
+# Observations of one metric (for one set of labels) - running count and sum, and a window of recent values for quantiles
+class _Series:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window_size)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantile(self, q):
+        values = sorted(self.recent)
+        return values[min(int(q * len(values)), len(values) - 1)] if values else float("nan")
+
+
+# Thread-safe store of summaries (timings and sizes, reported with quantiles) and counters, rendered in the Prometheus text format
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries = defaultdict(dict)
+        self._counters = defaultdict(lambda: defaultdict(float))
+        self._help = {}
+
+    def observe(self, name, value, help_text="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._summaries[name].setdefault(key, _Series()).observe(value)
+
+    def increment(self, name, amount=1, help_text="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._counters[name][key] += amount
+
+    def summary(self, name, **labels):
+        with self._lock:
+            series = self._summaries[name].get(tuple(sorted(labels.items())))
+            if series is None:
+                return None
+            return {"count": series.count,
+                    "sum": series.sum,
+                    **{f"p{round(q * 100)}": series.quantile(q) for q in quantiles}}
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, series_by_labels in sorted(self._summaries.items()):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} summary")
+                for key, series in sorted(series_by_labels.items()):
+                    for q in quantiles:
+                        lines.append(f"{name}{_format_labels(key + (('quantile', str(q)),))} {series.quantile(q)}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {series.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {series.count}")
+            for name, values in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{label}="{value}"' for label, value in key) + "}"
+
+
+metrics = MetricsRegistry()
+_local = threading.local()
+
+
+# Record the time since the last lap (or since the callback started) against a phase of the running instrumented callback - does nothing outside one
+def lap(phase):
+    timer = getattr(_local, "timer", None)
+    if timer is None:
+        return
+    now = time.perf_counter()
+    timer["phases"][phase] += now - timer["last"]
+    timer["last"] = now
+
+
+# Decorator timing a callback in total and by phase (see lap), and counting calls by outcome
+def instrument(callback):
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_local, "timer", None)
+        start = time.perf_counter()
+        _local.timer = {"last": start, "phases": defaultdict(float)}
+        profiler = cProfile.Profile() if profile_dir else None
+        outcome = "error"
+        try:
+            if profiler:
+                profiler.enable()
+            result = callback(*args, **kwargs)
+            outcome = "ok"
+            return result
+        except Exception as e:
+            # Dash uses PreventUpdate to skip an update, which is not an error
+            if type(e).__name__ == "PreventUpdate":
+                outcome = "prevented"
+            raise
+        finally:
+            end = time.perf_counter()
+            if profiler:
+                profiler.disable()
+                os.makedirs(profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(profile_dir, f"{name}-{time.time_ns()}.prof"))
+            timer = _local.timer
+            _local.timer = outer
+            metrics.observe("nor_callback_seconds", end - start, "Callback run time in seconds", callback=name)
+            for phase, seconds in timer["phases"].items():
+                metrics.observe("nor_callback_phase_seconds", seconds, "Callback run time by phase in seconds", callback=name, phase=phase)
+            metrics.increment("nor_callback_calls_total", help_text="Callback calls by outcome", callback=name, outcome=outcome)
+    return wrapper
@@ -1,6 +1,11 @@
+from functools import lru_cache
+import os
 import numpy as np
-import plotly.graph_objects as go
-import scipy.stats as stat
+from numpy.lib.stride_tricks import sliding_window_view
+
+from nor_figure import figure, scatter
+
+# plotly and scipy are imported where they are used, so importing this module (and starting the app) does not load them
 
 # Colour palette
 stat_colours = {
@@ -13,125 +18,404 @@ stat_colours = {
 }
 
 
+# Adaptive sampling - maximum linear interpolation error between samples as a fraction of the curve peak, and target rendered width of the curve in pixels
+sampling_tolerance = 1e-4
+sampling_pixel_width = 1000
+# Base curve covers the middle 99.98% of the distribution; the sampling grid extends further so shaded regions past the curve stay within tolerance
+_std_z_min = -3.7190164854556804  # stat.norm.ppf(0.0001)
+_std_z_max = 3.719016485455709  # stat.norm.ppf(0.9999)
+_sampling_z_limit = 8.5
+_inv_sqrt_2pi = 1 / np.sqrt(2 * np.pi)
+
+
+# Standard normal (mean 0, standard deviation 1) sampling grid with point density chosen from the curvature of the pdf
+# Linear interpolation over a step h has error of at most h^2/8 * max|pdf''| across the step, so the local density is set to sqrt(max|pdf''| / (8 * tolerance)) - dense near the mean and the inflection points, sparse in the tails
+# Density is capped at one point per pixel across the base curve; the grid is symmetric and always includes z = 0
+@lru_cache(maxsize=8)
+def standard_sampling_grid(tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    z = np.linspace(0, _sampling_z_limit, 8501)
+    # Relative curvature |pdf''(z) / pdf(0)|, taken as its maximum over a window of 0.25 so the density does not collapse where pdf'' changes sign
+    curvature = sliding_window_view(np.pad(np.abs(z * z - 1) * np.exp(-0.5 * z * z), 125, mode="symmetric"), 251).max(axis=1)
+    density = np.minimum(np.sqrt(curvature / (8 * tolerance)),
+                         pixel_width / (_std_z_max - _std_z_min))
+    cumulative = np.concatenate(([0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(z))))
+    num_steps = max(int(np.ceil(cumulative[-1])), 1)
+    positive_z = np.interp(np.linspace(0, cumulative[-1], num_steps + 1), cumulative, z)
+    std_z = np.concatenate((-positive_z[:0:-1], positive_z))
+    std_z.flags.writeable = False
+    return std_z
+
+
+# Fill the sampling grid cache, lookup table and figure template and load the lazily imported plotly modules - called before server workers are forked so they share this state
+def warm_model():
+    standard_sampling_grid()
+    normal_cdf(0, 0, 1)
+    create_blank_fig()
+
+
+# Default sampling grid and base curve limits as JSON-ready data for the client-side rendering path (assets/nor_clientside.js)
+def sampling_grid_data():
+    return {"std_z": standard_sampling_grid().tolist(),
+            "z_min": float(_std_z_min),
+            "z_max": float(_std_z_max)}
+
+
+# Evaluate the normal pdf at x for mean (mu) and standard deviation (sigma) by standardising x - avoids building a scipy frozen distribution per call
+def normal_pdf(x, mu, sigma):
+    z = (np.asarray(x, dtype=float) - mu) / sigma
+    with np.errstate(over="ignore"):
+        return np.exp(-0.5 * z * z) * _inv_sqrt_2pi / sigma
+
+
+# Evaluate the normal cdf at x for mean (mu) and standard deviation (sigma), from the standard normal lookup table
+def normal_cdf(x, mu, sigma):
+    return table_ndtr((np.asarray(x, dtype=float) - mu) / sigma)
+
+
+# Standard normal lookup table - cdf and pdf at z from -8.5 to 0 in steps of 1/256, written to assets/normal_table.bin by nor_build.py so it is also served as a static asset
+# The file is a little-endian float64 array: a header of format version, first z, step, number of points (n) and absolute and relative error bounds, then the n cdf values and the n pdf values
+# Between points the cdf is the cubic Hermite interpolant of the cdf values with the pdf values as slopes, with error at most step^4/384 * max|pdf'''| - 3.4e-13 absolute and 3.2e-9 relative,
+# so upper tails taken as cdf(-z) keep 8 significant figures out to 8.5 standard deviations. Values for z > 0 use cdf(z) = 1 - cdf(-z), and z beyond the table falls back to scipy
+normal_table_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "normal_table.bin")
+_table_version = 1
+_table_step = 1 / 256
+_table_header_size = 6
+
+
+# Build the standard normal lookup table (see normal_table_path for the layout), with the error bounds taken from |pdf'''(z)| = |z^3 - 3z| * pdf(z) on a fine mesh
+def build_normal_table():
+    from scipy.special import ndtr
+    count = int(round(_sampling_z_limit / _table_step)) + 1
+    z = np.linspace(-_sampling_z_limit, 0, count)
+    mesh = np.linspace(-_sampling_z_limit, 0, 64 * (count - 1) + 1)
+    error = _table_step ** 4 / 384 * np.abs(mesh ** 3 - 3 * mesh) * normal_pdf(mesh, 0, 1)
+    # The relative bound divides by the smallest cdf value the error can apply to, one step below each mesh point
+    header = [_table_version, -_sampling_z_limit, _table_step, count, error.max(), (error / ndtr(mesh - _table_step)).max()]
+    return np.concatenate((header, ndtr(z), normal_pdf(z, 0, 1)))
+
+
+def write_normal_table(path=normal_table_path):
+    build_normal_table().astype("<f8").tofile(path)
+
+
+# Read the standard normal lookup table, building it in memory if it has not been written (or was written in another format version)
+# Returns the first z, the step and the cdf and pdf values
+@lru_cache(maxsize=1)
+def load_normal_table(path=normal_table_path):
+    table = np.fromfile(path, dtype="<f8") if os.path.exists(path) else np.empty(0)
+    if len(table) < _table_header_size or table[0] != _table_version:
+        table = build_normal_table()
+    count = int(table[3])
+    cdf = table[_table_header_size:_table_header_size + count]
+    pdf = table[_table_header_size + count:_table_header_size + 2 * count]
+    table.flags.writeable = False
+    return float(table[1]), float(table[2]), cdf, pdf
+
+
+# Standard normal cdf (as scipy.special.ndtr) interpolated from the lookup table with a fixed amount of work per value - scipy is only imported for values outside the table (|z| > 8.5, or NaN)
+def table_ndtr(z):
+    z = np.asarray(z, dtype=float)
+    z_first, step, cdf, pdf = load_normal_table()
+    if z.ndim == 0:
+        return _table_ndtr_scalar(float(z), z_first, step, cdf, pdf)
+    lower = -np.abs(z)
+    with np.errstate(invalid="ignore"):
+        t = (lower - z_first) / step
+        inside = t >= 0
+    i = np.minimum(np.where(inside, t, 0).astype(int), len(cdf) - 2)
+    u = np.where(inside, t, 0) - i
+    value = ((1 + 2 * u) * (1 - u) ** 2 * cdf[i] + u * (1 - u) ** 2 * step * pdf[i]
+             + u * u * (3 - 2 * u) * cdf[i + 1] + u * u * (u - 1) * step * pdf[i + 1])
+    if not inside.all():
+        from scipy.special import ndtr
+        value = np.where(inside, value, ndtr(lower))
+    return np.where(z > 0, 1 - value, value)[()]
+
+
+# table_ndtr for a single value in plain floats - the app's queries are single values, where numpy's per-call overhead would outweigh the interpolation itself
+def _table_ndtr_scalar(z, z_first, step, cdf, pdf):
+    t = (-abs(z) - z_first) / step
+    if not t >= 0:
+        from scipy.special import ndtr
+        return float(ndtr(z))
+    i = min(int(t), len(cdf) - 2)
+    u = t - i
+    value = ((1 + 2 * u) * (1 - u) ** 2 * cdf[i] + u * (1 - u) ** 2 * step * pdf[i]
+             + u * u * (3 - 2 * u) * cdf[i + 1] + u * u * (u - 1) * step * pdf[i + 1])
+    return float(1 - value if z > 0 else value)
+
+
+# Curve section from x_start to x_end, sliced from the cached standard sampling grid - the end points are always exactly x_start and x_end
+def _curve_between(mu, sigma, x_start, x_end, tolerance, pixel_width):
+    std_z = standard_sampling_grid(tolerance, pixel_width)
+    z_low, z_high = sorted(((x_start - mu) / sigma, (x_end - mu) / sigma))
+    i = np.searchsorted(std_z, z_low, side="right")
+    j = np.searchsorted(std_z, z_high, side="left")
+    x = np.concatenate(([min(x_start, x_end)], mu + sigma * std_z[i:j], [max(x_start, x_end)]))
+    if x_start > x_end:
+        # Copied rather than a reversed view - orjson only serializes C-contiguous arrays directly, and plotly falls back to a slow recursive conversion of the whole figure otherwise
+        x = x[::-1].copy()
+    return x, normal_pdf(x, mu, sigma)
+
+
 # Generate normal distribution for mean (mu) and standard deviation (sigma) user entry
-def normal_distribution(mu, sigma):
-    x = np.linspace(stat.norm(mu, sigma).ppf(0.0001),
-                    stat.norm(mu, sigma).ppf(0.9999),
-                    10000)
-    norm_x = stat.norm(mu, sigma).pdf(x)
-    return x, norm_x
+def normal_distribution(mu, sigma, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    return _curve_between(mu, sigma, mu + sigma * _std_z_min, mu + sigma * _std_z_max, tolerance, pixel_width)
 
 
 # Calculate probability for selected calculation type "Z < z1" or "Z > z1"
-def calculate_probability_z1(mu, sigma, z1, calc_type):
-    x1 = stat.norm(mu, sigma).cdf(z1)
+def calculate_probability_z1(mu, sigma, z1, calc_type, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    probability = round(table_probability(mu, sigma, z1, None, calc_type)*100, 2)
     if calc_type == "<":
-        probability = round(x1*100, 2)
-        prob_less_than_x1 = np.linspace(stat.norm(mu, sigma).ppf(0.0001),
-                                        stat.norm(mu, sigma).ppf(x1),
-                                        10000)
-        norm_pdf = stat.norm(mu, sigma).pdf(prob_less_than_x1)
+        prob_less_than_x1, norm_pdf = _curve_between(mu, sigma, mu + sigma * _std_z_min, z1, tolerance, pixel_width)
         return probability, prob_less_than_x1, norm_pdf
     elif calc_type == ">":
-        probability = round((1 - x1)*100, 2)
-        prob_greater_than_x1 = np.linspace(stat.norm(mu, sigma).ppf(x1),
-                                           stat.norm(mu, sigma).ppf(0.9999),
-                                           10000)
-        norm_pdf = stat.norm(mu, sigma).pdf(prob_greater_than_x1)
+        prob_greater_than_x1, norm_pdf = _curve_between(mu, sigma, z1, mu + sigma * _std_z_max, tolerance, pixel_width)
         return probability, prob_greater_than_x1, norm_pdf
 
 
 # Calculate probability for selected calculation type "z1 < Z < z2" or "Z < z1 and Z > z2"
-def calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type):
+def calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    probability = round(table_probability(mu, sigma, z1, z2, calc_type)*100, 2)
     if calc_type == "<>":
-        x1 = stat.norm(mu, sigma).cdf(max(z1, z2))
-        x2 = stat.norm(mu, sigma).cdf(min(z1, z2))
-        probability = round((x1 - x2)*100, 2)
-        prob_between_x1_x2 = np.linspace(stat.norm(mu, sigma).ppf(x1),
-                                         stat.norm(mu, sigma).ppf(x2),
-                                         10000)
-        norm_pdf = stat.norm(mu, sigma).pdf(prob_between_x1_x2)
+        prob_between_x1_x2, norm_pdf = _curve_between(mu, sigma, max(z1, z2), min(z1, z2), tolerance, pixel_width)
         return probability, prob_between_x1_x2, norm_pdf
     elif calc_type == "><":
-        x1 = stat.norm(mu, sigma).cdf(z1)
-        x2 = stat.norm(mu, sigma).cdf(z2)
-        probability = round((x1 + (1 - x2))*100, 2)
-        prob_less_than_x1 = np.linspace(stat.norm(mu, sigma).ppf(0.0001),
-                                        stat.norm(mu, sigma).ppf(x1),
-                                        10000)
-        norm_pdf1 = stat.norm(mu, sigma).pdf(prob_less_than_x1)
-        prob_greater_than_x2 = np.linspace(stat.norm(mu, sigma).ppf(x2),
-                                           stat.norm(mu, sigma).ppf(0.9999),
-                                           10000)
-        norm_pdf2 = stat.norm(mu, sigma).pdf(prob_greater_than_x2)
+        prob_less_than_x1, norm_pdf1 = _curve_between(mu, sigma, mu + sigma * _std_z_min, z1, tolerance, pixel_width)
+        prob_greater_than_x2, norm_pdf2 = _curve_between(mu, sigma, z2, mu + sigma * _std_z_max, tolerance, pixel_width)
         return probability, prob_less_than_x1, prob_greater_than_x2, norm_pdf1, norm_pdf2
 
 
+# Sweep of z1 from mu - 4*sigma to mu + 4*sigma (to z2 for "z1 < Z < z2" and "Z < z1 and Z > z2") in steps, for the animated sweep mode
+# Probabilities, grid positions and curve end points for every step are computed in one vectorized pass; the shaded curve sections are sliced from the sampling grid lazily as the steps are iterated
+# Yields (z1, probability, sections) for each step - sections are the (x, y) curves of the shaded areas that move with z1, equal to those from calculate_probability_z1 and calculate_probability_z1_z2
+# (for "Z < z1 and Z > z2" only the area below z1 moves, so the area above z2 is not included)
+def sweep_z1(mu, sigma, calc_type, z2=None, steps=81, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    std_z = standard_sampling_grid(tolerance, pixel_width)
+    z1_end = mu + 4 * sigma if calc_type in ("<", ">") else z2
+    z1 = np.linspace(mu - 4 * sigma, z1_end, steps)
+    probability = batch_probabilities(mu, sigma, z1, z2, calc_type)
+    # Curve end points of the moving section for each step - as _curve_between, the section runs from start to end
+    if calc_type == ">":
+        start, end = z1, np.full(steps, mu + sigma * _std_z_max)
+    elif calc_type == "<>":
+        start, end = np.full(steps, float(z2)), z1
+    else:
+        start, end = np.full(steps, mu + sigma * _std_z_min), z1
+    low, high = np.minimum(start, end), np.maximum(start, end)
+    i = np.searchsorted(std_z, (low - mu) / sigma, side="right")
+    j = np.searchsorted(std_z, (high - mu) / sigma, side="left")
+    x_grid = mu + sigma * std_z
+    pdf_grid, pdf_low, pdf_high = normal_pdf(x_grid, mu, sigma), normal_pdf(low, mu, sigma), normal_pdf(high, mu, sigma)
+    for k in range(steps):
+        x = np.concatenate(([low[k]], x_grid[i[k]:j[k]], [high[k]]))
+        y = np.concatenate(([pdf_low[k]], pdf_grid[i[k]:j[k]], [pdf_high[k]]))
+        if start[k] > end[k]:
+            x, y = x[::-1].copy(), y[::-1].copy()
+        yield z1[k], probability[k], [(x, y)]
+
+
+# Shared x sampling grid for overlaying normal curves with means mu and standard deviations sigma (arrays) - the union of each curve's standard sampling grid over its base curve,
+# with points closer than one pixel (of pixel_width across all the curves) merged, so the grid size stays bounded however many curves there are
+# Each curve's end points, mean and +/-1/2/3SD are included exactly, so a curve narrower than a few pixels keeps its peak and meets the empirical rule lines
+def shared_sampling_grid(mu, sigma, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    std_z = standard_sampling_grid(tolerance, pixel_width)
+    std_z = std_z[(std_z > _std_z_min) & (std_z < _std_z_max)]
+    low, high = mu + sigma * _std_z_min, mu + sigma * _std_z_max
+    x_min, x_max = low.min(), high.max()
+    pixel = (x_max - x_min) / pixel_width
+    x = (mu[:, None] + sigma[:, None] * std_z).ravel()
+    rule_x = (mu[:, None] + sigma[:, None] * np.arange(-3, 4)).ravel()
+    return np.unique(np.concatenate((x_min + pixel * np.unique(np.round((x - x_min) / pixel)), low, high, rule_x)))
+
+
+# Overlay of normal curves for arrays of mean (mu) and standard deviation (sigma) with the same calculation type, z1 and z2 - all curves are evaluated on one shared_sampling_grid in a single broadcast
+# Returns the probabilities (percentages rounded as in calculate_probability_z1 and calculate_probability_z1_z2), the (x, y) base curve of each distribution and the list of (x, y) shaded sections of each
+# With calc_type None (or z values the app would reject) only the base curves are returned, with no probabilities or shaded sections
+def overlay_distributions(mu, sigma, calc_type=None, z1=None, z2=None, tolerance=sampling_tolerance, pixel_width=sampling_pixel_width):
+    mu, sigma = np.atleast_1d(np.asarray(mu, dtype=float)), np.atleast_1d(np.asarray(sigma, dtype=float))
+    x = shared_sampling_grid(mu, sigma, tolerance, pixel_width)
+    pdf = normal_pdf(x, mu[:, None], sigma[:, None])
+    low, high = mu + sigma * _std_z_min, mu + sigma * _std_z_max
+    i, j = np.searchsorted(x, low, side="left"), np.searchsorted(x, high, side="right")
+    curves = [(x[i[k]:j[k]], pdf[k, i[k]:j[k]]) for k in range(len(mu))]
+    probability = np.full(len(mu), np.nan) if calc_type is None else batch_probabilities(mu, sigma, z1, z2, calc_type)
+    if np.isnan(probability).all():
+        return probability, curves, [[] for _ in curves]
+    z1, z2 = np.full(len(mu), float(z1)), np.full(len(mu), np.nan if z2 is None else float(z2))
+    # Start and end of each shaded section for every curve, as in calculate_probability_z1 and calculate_probability_z1_z2
+    bounds = {"<": [(low, z1)], ">": [(z1, high)], "<>": [(z1, z2)], "><": [(low, z1), (z2, high)]}[calc_type]
+    sections = [[] for _ in curves]
+    for start, end in bounds:
+        a, b = np.minimum(start, end), np.maximum(start, end)
+        i, j = np.searchsorted(x, a, side="right"), np.searchsorted(x, b, side="left")
+        pdf_a, pdf_b = normal_pdf(a, mu, sigma), normal_pdf(b, mu, sigma)
+        for k in range(len(mu)):
+            sections[k].append((np.concatenate(([a[k]], x[i[k]:j[k]], [b[k]])), np.concatenate(([pdf_a[k]], pdf[k, i[k]:j[k]], [pdf_b[k]]))))
+    return probability, curves, sections
+
+
+# Calculation type codes accepted by the probability functions below
+calc_type_codes = {"<": 0, ">": 1, "<>": 2, "><": 3}
+
+
+# Convert calculation type strings (or codes) to an array of calculation type codes
+def _calc_type_code_array(calc_type):
+    calc_type = np.asarray(calc_type)
+    if calc_type.dtype.kind in "UO":
+        names, inverse = np.unique(calc_type.astype(str), return_inverse=True)
+        unknown = [str(name) for name in names if name not in calc_type_codes]
+        if unknown:
+            raise ValueError(f"Unknown calculation type {unknown[0]!r}")
+        return np.array([calc_type_codes[name] for name in names])[inverse].reshape(calc_type.shape)
+    if not np.isin(calc_type, list(calc_type_codes.values())).all():
+        raise ValueError("Unknown calculation type code")
+    return calc_type
+
+
+# Standardised bounds for the probability functions - a = (z1 - mu)/sigma, b = (z2 - mu)/sigma, and the lower and upper of the two for "z1 < Z < z2"
+def _standardised_bounds(mu, sigma, z1, z2, calc_type):
+    codes = _calc_type_code_array(calc_type)
+    mu, sigma, z1, z2, codes = np.broadcast_arrays(np.asarray(mu, dtype=float),
+                                                   np.asarray(sigma, dtype=float),
+                                                   np.asarray(z1, dtype=float),
+                                                   np.asarray(z2, dtype=float),
+                                                   codes)
+    a = (z1 - mu) / sigma
+    b = (z2 - mu) / sigma
+    return codes, a, b, np.minimum(a, b), np.maximum(a, b)
+
+
+# Probability (as a fraction) that Z satisfies the calculation type, for arrays (or single values) of mean (mu), standard deviation (sigma), z1, z2 and calculation type
+# Upper tails use the survival function ndtr(-z) instead of 1 - cdf, and "z1 < Z < z2" above the mean is a difference of survival functions, so small probabilities in either tail keep full precision
+# Bounds are used directly in x-space (no cdf -> ppf round trip), so any finite input gives a result without NaNs
+def exact_probability(mu, sigma, z1, z2, calc_type):
+    from scipy.special import ndtr
+    return _probability(ndtr, mu, sigma, z1, z2, calc_type)
+
+
+# exact_probability with the cdf interpolated from the standard normal lookup table (see table_ndtr) - used for the app's results, so serving requests does not need scipy
+def table_probability(mu, sigma, z1, z2, calc_type):
+    if isinstance(calc_type, str) and calc_type in calc_type_codes and all(np.ndim(value) == 0 for value in (mu, sigma, z1, z2)) and sigma > 0:
+        return _table_probability_scalar(float(mu), float(sigma), float(z1), z2, calc_type)
+    return _probability(table_ndtr, mu, sigma, z1, z2, calc_type)
+
+
+# table_probability for single values, evaluating only the calculation type asked for
+def _table_probability_scalar(mu, sigma, z1, z2, calc_type):
+    table = load_normal_table()
+    a = (z1 - mu) / sigma
+    if calc_type == "<":
+        return _table_ndtr_scalar(a, *table)
+    if calc_type == ">":
+        return _table_ndtr_scalar(-a, *table)
+    b = (float(z2) - mu) / sigma
+    if calc_type == "><":
+        return _table_ndtr_scalar(a, *table) + _table_ndtr_scalar(-b, *table)
+    # NaN bounds fail the comparison, so they reach _table_ndtr_scalar and give NaN as in exact_probability
+    low, high = (a, b) if a <= b else (b, a)
+    if low > 0:
+        return _table_ndtr_scalar(-low, *table) - _table_ndtr_scalar(-high, *table)
+    return _table_ndtr_scalar(high, *table) - _table_ndtr_scalar(low, *table)
+
+
+def _probability(ndtr, mu, sigma, z1, z2, calc_type):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        codes, a, b, low, high = _standardised_bounds(mu, sigma, z1, z2, calc_type)
+        between = np.where(low > 0, ndtr(-low) - ndtr(-high), ndtr(high) - ndtr(low))
+        probability = np.select([codes == 0, codes == 1, codes == 2, codes == 3],
+                                [ndtr(a), ndtr(-a), between, ndtr(a) + ndtr(-b)])
+    return probability[()]
+
+
+# Natural log of exact_probability, computed in log space with log_ndtr so probabilities too small for a float (beyond about 38 standard deviations) are still resolved
+def log_probability(mu, sigma, z1, z2, calc_type):
+    from scipy.special import log_ndtr
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        codes, a, b, low, high = _standardised_bounds(mu, sigma, z1, z2, calc_type)
+        # log(P(Z < high) - P(Z < low)), using the upper tail when both bounds are above the mean
+        upper = low > 0
+        log_larger = np.where(upper, log_ndtr(-low), log_ndtr(high))
+        log_smaller = np.where(upper, log_ndtr(-high), log_ndtr(low))
+        log_between = log_larger + np.log1p(-np.exp(log_smaller - log_larger))
+        log_p = np.select([codes == 0, codes == 1, codes == 2, codes == 3],
+                          [log_ndtr(a), log_ndtr(-a), log_between, np.logaddexp(log_ndtr(a), log_ndtr(-b))])
+    return log_p[()]
+
+
+# Probabilities for arrays of mean (mu), standard deviation (sigma), z1, z2 and calculation type in one vectorized pass, without building any plotting data
+# Arrays are broadcast against each other and calc_type may hold codes (see calc_type_codes) or the calculation type strings; z2 is only used by "<>" and "><"
+# Returns percentages rounded to decimals places (None for unrounded), computed as in calculate_probability_z1 and calculate_probability_z1_z2
+# With log True, returns the natural logs of the probabilities as fractions from log_probability instead, unrounded, for probabilities too small to show as percentages
+# Queries with no probability (missing z1 or z2, z1 greater than z2, sigma not greater than 0) give NaN. The app's input limits (nor_inputs.py) are not applied -
+# any positive sigma and any values are computed as given, and z1 and z2 are not clamped, so tail probabilities far beyond +/-4SD can be queried
+def batch_probabilities(mu, sigma, z1, z2, calc_type, decimals=2, log=False):
+    codes = _calc_type_code_array(calc_type)
+    mu, sigma, z1, z2, codes = np.broadcast_arrays(np.asarray(mu, dtype=float),
+                                                   np.asarray(sigma, dtype=float),
+                                                   np.asarray(z1, dtype=float),
+                                                   np.asarray(z2, dtype=float),
+                                                   codes)
+    if log:
+        probability = np.array(log_probability(mu, sigma, z1, z2, codes))
+    else:
+        probability = np.array(table_probability(mu, sigma, z1, z2, codes)*100)
+    two_sided = codes >= 2
+    invalid = (sigma <= 0) | np.isnan(z1) | (two_sided & (np.isnan(z2) | (z1 > z2)))
+    probability[invalid] = np.nan
+    if decimals is not None and not log:
+        probability = np.round(probability, decimals)
+    return probability
+
+
+# Empirical rule marker groups - SDs from the mean, legend name and colour. Each group is drawn as one trace
+empirical_rule_groups = [(0, "Mean", stat_colours["mean"]),
+                         (1, u"Mean \u00B1 1SD", stat_colours["+-1std"]),
+                         (2, u"Mean \u00B1 2SD", stat_colours["+-2std"]),
+                         (3, u"Mean \u00B1 3SD", stat_colours["+-3std"])]
+
+
+# Scatter trace of vertical lines at line_x from 0 up to line_height, separated by gaps (NaN) - each line has 10 points so it can be hovered along its length, with its label as the hover text
+def empirical_rule_trace(line_x, line_height, labels, name, colour):
+    x = np.repeat(np.asarray(line_x, dtype=float), 11)
+    x[10::11] = np.nan
+    y = (np.asarray(line_height, dtype=float)[:, None] * np.append(np.linspace(0, 1, 10), np.nan)).ravel()
+    return scatter(x=x,
+                   y=y,
+                   text=[None if i == 10 else label for label in labels for i in range(11)],
+                   mode="lines+markers",
+                   name=name,
+                   marker={"color": colour, "opacity": 0},
+                   hovertemplate="%{text}: %{x:.3f}<extra></extra>")
+
+
+# Traces for the mean and +/-1/2/3SD lines of the normal distribution with mean (mu) and standard deviation (sigma), one per empirical_rule_groups entry, with the line heights from one vectorized pdf evaluation
+def empirical_rule_traces(mu, sigma):
+    offsets = np.array([0, 1, -1, 2, -2, 3, -3])
+    line_x = mu + offsets * sigma
+    line_height = normal_pdf(line_x, mu, sigma)
+    traces = []
+    for k, name, colour in empirical_rule_groups:
+        members = np.abs(offsets) == k
+        labels = [f"Mean {'+' if offset > 0 else '-'} {abs(offset)}SD" if offset else "Mean" for offset in offsets[members]]
+        traces.append(empirical_rule_trace(line_x[members], line_height[members], labels, name, colour))
+    return traces
+
+
 # Create blank figure with lines for mean, +-1/2/3SD; mean (mu) = 0, standard deviation (sigma) = 1
 def create_blank_fig():
-    x = np.linspace(stat.norm.ppf(0.0001),
-                    stat.norm.ppf(0.9999),
-                    10000)
-    norm_x = stat.norm.pdf(x)
     mu = 0
     sigma = 1
-    blank_fig = go.Figure(
-        go.Scatter(x=x,
-                   y=norm_x,
-                   name="Normal distribution",
-                   marker_color=stat_colours["norm"],
-                   hoverinfo="skip"),
-        layout={"margin": dict(t=20, b=10, l=20, r=20),
-                "height": 400,
-                "font_size": 14})
-    blank_fig.add_trace(
-        go.Scatter(x=[mu] * 10,
-                   y=np.linspace(0, max(norm_x), 10),
-                   name="Mean",
-                   marker_color=stat_colours["mean"],
-                   marker_opacity=0,
-                   hovertemplate="Mean: %{x:.3f}<extra></extra>"))
-    blank_fig.add_trace(
-        go.Scatter(x=[sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(sigma + mu), 10),
-                   name=u"Mean \u00B1 1SD",
-                   marker_color=stat_colours["+-1std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 1SD: %{x:.3f}<extra></extra>"))
-    blank_fig.add_trace(
-        go.Scatter(x=[-sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(sigma + mu), 10),
-                   marker_color=stat_colours["+-1std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 1SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    blank_fig.add_trace(
-        go.Scatter(x=[2*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(2*sigma + mu), 10),
-                   name=u"Mean \u00B1 2SD",
-                   marker_color=stat_colours["+-2std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 2SD: %{x:.3f}<extra></extra>"))
-    blank_fig.add_trace(
-        go.Scatter(x=[-2*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(2*sigma + mu), 10),
-                   marker_color=stat_colours["+-2std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 2SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    blank_fig.add_trace(
-        go.Scatter(x=[3*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(3*sigma + mu), 10),
-                   name=u"Mean \u00B1 3SD",
-                   marker_color=stat_colours["+-3std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean + 3SD: %{x:.3f}<extra></extra>"))
-    blank_fig.add_trace(
-        go.Scatter(x=[-3*sigma + mu] * 10,
-                   y=np.linspace(0, stat.norm(mu, sigma).pdf(3*sigma + mu), 10),
-                   marker_color=stat_colours["+-3std"],
-                   marker_opacity=0,
-                   hovertemplate="Mean - 3SD: %{x:.3f}<extra></extra>",
-                   showlegend=False))
-    blank_fig.update_layout(dragmode=False)
+    x, norm_x = normal_distribution(mu, sigma)
+    blank_fig = figure(
+        [scatter(x=x,
+                 y=norm_x,
+                 name="Normal distribution",
+                 marker={"color": stat_colours["norm"]},
+                 hoverinfo="skip")],
+        margin=dict(t=20, b=10, l=20, r=20),
+        height=400,
+        font={"size": 14})
+    blank_fig["data"].extend(empirical_rule_traces(mu, sigma))
+    blank_fig["layout"]["dragmode"] = False
     return blank_fig
@@ -1,9 +1,27 @@
+import os
 from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
-from nor_model import create_blank_fig
+from flask import Flask
+from flask_compress import Compress
+from nor_build import load_layout_data
+
+# Blank figure and sampling grid, precomputed at build time by nor_build.py
+layout_data = load_layout_data()
+
+# Compression of layout and callback responses by Flask-Compress - Brotli or gzip as the browser accepts, for responses of at least NOR_COMPRESS_MIN_SIZE bytes,
+# at NOR_COMPRESS_BR_LEVEL (Brotli) and NOR_COMPRESS_LEVEL (gzip). Added here rather than with Dash's compress=True, so nor_controller.py can tell which content coding
+# a response will be sent with (see not_modified). Static assets and component suites are compressed once instead (see compress_static in nor_controller.py)
+server = Flask(__name__)
+server.config.update(COMPRESS_ALGORITHM=["br", "gzip"],
+                     COMPRESS_MIN_SIZE=int(os.environ.get("NOR_COMPRESS_MIN_SIZE", 1024)),
+                     COMPRESS_BR_LEVEL=int(os.environ.get("NOR_COMPRESS_BR_LEVEL", 4)),
+                     COMPRESS_LEVEL=int(os.environ.get("NOR_COMPRESS_LEVEL", 6)))
+compression = Compress(server)
 
 # Specify HTML <head> elements
 app = Dash(__name__,
+           server=server,
+           compress=False,
            title="Normal distribution",
            update_title=None,
            external_stylesheets=[dbc.themes.BOOTSTRAP],
@@ -34,7 +52,7 @@ app.layout = dbc.Container([
             # Graph components are placed inside a Div with role="img" to manage the experience for screen reader users
             html.Div([
                 dcc.Graph(id="normal-dist-fig",
-                          figure=create_blank_fig(),
+                          figure=layout_data["blank_fig"],
                           config={"displayModeBar": False,
                                   "doubleClick": False,
                                   "editable": False,
@@ -45,7 +63,17 @@ app.layout = dbc.Container([
             html.Div(id="sr-norm",
                      children=[],
                      className="sr-only",
-                     **{"aria-live": "polite"})
+                     **{"aria-live": "polite"}),
+            # Standard sampling grid used when the graph is rendered client-side (NOR_RENDER_MODE=client)
+            dcc.Store(id="sampling-grid",
+                      data=layout_data["sampling_grid"]),
+            # Inputs the graph on screen was drawn from, so update_graph can send only the parts that change
+            dcc.Store(id="rendered-inputs",
+                      data=None),
+            # Id for this browser tab's session, set by assets/nor_clientside.js - keys the session's base curve in the server-side session store (see session_store in nor_controller.py)
+            dcc.Store(id="session-id",
+                      storage_type="session",
+                      data=None)
         ], xs=12, lg=8)
     ]),
     # Row - Results and User Input
@@ -91,7 +119,10 @@ app.layout = dbc.Container([
                       min=0.1,
                       type="number",
                       required=True,
-                      debounce=True)
+                      debounce=True),
+            dbc.FormFeedback(id="distribution-error",
+                             children=[],
+                             type="invalid")
         ], xs=4, lg=2),
         dbc.Col([
             dbc.Label("Calculation type",
@@ -151,7 +182,52 @@ app.layout = dbc.Container([
                            children="Submit",
                            class_name="button",
                            style={"width": 100})
+            ], className="d-flex justify-content-center"),
+            html.Br(),
+            # Animates the shaded area as z1 sweeps from -4SD to +4SD (to z2 for the two sided calculation types)
+            html.Div([
+                dbc.Button(id="sweep",
+                           n_clicks=0,
+                           children="Sweep z1",
+                           class_name="button",
+                           style={"width": 100})
             ], className="d-flex justify-content-center")
         ], xs=12, md=2)
-    ], class_name="justify-content-right")
+    ], class_name="justify-content-right"),
+    # Row - Comparison of several distributions, overlaid on the graph with the calculation type, z1 and z2 above
+    dbc.Row([
+        dbc.Col([
+            dbc.Label("Distributions to compare",
+                      className="label",
+                      html_for="compare-distributions"),
+            dbc.Textarea(id="compare-distributions",
+                         placeholder="One mean and standard deviation per line, e.g.\n0, 1\n2, 0.5",
+                         rows=4),
+            dbc.FormFeedback(id="compare-error",
+                             children=[],
+                             type="invalid"),
+            # Progress of a comparison computed as a background job, hidden until one starts - the job is polled every job-poll interval while it runs
+            dbc.Progress(id="job-progress",
+                         value=0,
+                         label="",
+                         striped=True,
+                         animated=True,
+                         style={"display": "none"}),
+            dcc.Store(id="job",
+                      data=None),
+            dcc.Interval(id="job-poll",
+                         interval=250,
+                         disabled=True)
+        ], xs=9, md=4, lg={"size": 4, "offset": 4}),
+        dbc.Col([
+            html.Br(),
+            html.Div([
+                dbc.Button(id="compare",
+                           n_clicks=0,
+                           children="Compare",
+                           class_name="button",
+                           style={"width": 100})
+            ], className="d-flex justify-content-center")
+        ], xs=3, md=2)
+    ])
 ], fluid=True)
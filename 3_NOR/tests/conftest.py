@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests are run from the 3_NOR directory (python -m pytest) and import the app modules from it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,206 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import pytest
+from dash import exceptions, no_update
+
+from nor_controller import app, update_graph
+from nor_figure import default_template, to_json
+from nor_model import sampling_grid_data
+from test_figure import assert_same
+
+# Parity tests for the client-side rendering path (NOR_RENDER_MODE=client) - assets/nor_clientside.js is run under node and its update_graph
+# must give the same outputs as update_graph in nor_controller.py for the same inputs
+node = shutil.which("node")
+pytestmark = pytest.mark.skipif(node is None, reason="node is not installed")
+
+clientside_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "nor_clientside.js")
+
+# Loads nor_clientside.js with stand-ins for the dash_clientside globals and runs nor.update_graph for each case read from stdin
+harness = """
+const fs = require("fs");
+const vm = require("vm");
+global.window = {"dash_clientside": {"no_update": {"no_update": true}, "PreventUpdate": {"prevent_update": true}}};
+vm.runInThisContext(fs.readFileSync(process.argv[1], "utf8"));
+const query = JSON.parse(fs.readFileSync(0, "utf8"));
+const results = query.cases.map(function (inputs) {
+    try {
+        return window.dash_clientside.nor.update_graph(1, ...inputs, null, query.figure, query.sampling);
+    } catch (e) {
+        if (e === window.dash_clientside.PreventUpdate) {
+            return "prevent_update";
+        }
+        throw e;
+    }
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+# Runs nor.sweep for each case read from stdin, with a fetch stand-in that records the query sent to /api/sweep and answers with an empty stream,
+# or rejects it with the given error
+sweep_harness = """
+const fs = require("fs");
+const vm = require("vm");
+global.window = {"dash_clientside": {"no_update": {"no_update": true}, "PreventUpdate": {"prevent_update": true}}};
+global.document = {
+    "getElementById": function () { return {"textContent": JSON.stringify({"requests_pathname_prefix": "/"})}; },
+    "querySelector": function () { return null; }
+};
+let sent = null;
+global.fetch = async function (url, options) {
+    sent = JSON.parse(options.body);
+    if (query.error) {
+        return {"ok": false, "json": async function () { return {"error": query.error}; }};
+    }
+    return {"ok": true, "body": {"getReader": function () { return {"read": async function () { return {"done": true}; }}; }}};
+};
+vm.runInThisContext(fs.readFileSync(process.argv[1], "utf8"));
+const query = JSON.parse(fs.readFileSync(0, "utf8"));
+(async function () {
+    const results = [];
+    for (const inputs of query.cases) {
+        sent = null;
+        window.dash_clientside.callback_context = {"triggered": [{"prop_id": "sweep.n_clicks", "value": 1}]};
+        const outputs = await window.dash_clientside.nor.sweep(1, 0, 0, ...inputs);
+        results.push({"outputs": outputs, "sent": sent});
+    }
+    process.stdout.write(JSON.stringify(results));
+})();
+"""
+
+
+# Outputs of the client-side update_graph for each (mu, sigma, calc_type, z1, z2) case, as JSON
+def clientside_outputs(cases):
+    query = {"cases": cases, "figure": {"layout": {"template": default_template()}}, "sampling": sampling_grid_data()}
+    result = subprocess.run([node, "-e", harness, clientside_path], input=json.dumps(query), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+# Outputs of the server-side update_graph for a case, as the client would receive them - no_update as the harness's stand-in
+def server_outputs(mu, sigma, calc_type, z1, z2):
+    try:
+        outputs = update_graph(1, mu, sigma, calc_type, z1, z2, None)
+    except exceptions.PreventUpdate:
+        return "prevent_update"
+    return [{"no_update": True} if value is no_update else value for value in outputs]
+
+
+# A value as the server receives it from the browser - JavaScript has one number type and JSON.stringify writes whole numbers without a decimal point, so they arrive as ints
+def as_sent(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+# Compare the client and server outputs for each case - the text outputs must match exactly, and the figures as in tests/test_figure.py
+# The rendered inputs (the last output) are only used by the server for partial updates, so they are not compared
+def assert_parity(cases):
+    for case, client in zip(cases, clientside_outputs(cases)):
+        server = server_outputs(*map(as_sent, case))
+        if server == "prevent_update" or client == "prevent_update":
+            assert client == server, case
+            continue
+        figure, *rest = server[:-1]
+        assert rest == client[1:-1], case
+        if figure == {"no_update": True}:
+            assert client[0] == figure, case
+        else:
+            assert_same(client[0], json.loads(to_json(figure)), f"{case} figure")
+
+
+# Inputs the server rejects, rounds or clamps
+validation_cases = [
+    (0, 1, "<", 1.23456, None),
+    (0.123456, 1, "<", 1, None),
+    (2.00001, 1, ">", 1, None),
+    (0, 0.05, "<", 1, None),
+    (0, 0.1, "<", 1, None),
+    (0, -1, "<", 1, None),
+    (1000001, 1, "<", 1, None),
+    (-1e6, 1e6, "<>", -1e6, 1e6),
+    (0, 1.5e6, "<", 1, None),
+    ("1", 1, "<", 1, None),
+    (True, 1, "<", 1, None),
+    (0, 1, "<", "1", None),
+    (0, 1, "<>", 0, 2e6),
+    (0, 1, "<", 1, "ignored for <"),
+    (0, 1, None, 1, None),
+    (0, 1, "=", 1, None),
+    (0, 1, "<", 9, None),
+    (0, 1, ">", -9.5, None),
+    (0.5, 1, "<", 9, None),
+    (0, 2.5, "<>", -11, 11),
+    (0, 1, "<>", 5, 6),
+    (0, 1, "<", 0.03125, None),
+    (0, 1, "<", -0.03125, None),
+    (0, 1, "<", 1.00005, None),
+    (-0.00001, 1, "<", 0, None),
+    (0, 1, "<", None, None),
+    (0, 1, "><", 1, None),
+    (0, 1, "<>", 2, 1),
+    (None, 1, "<", 1, None),
+    (0, None, "<", 1, None),
+]
+
+
+def test_validation_matches_server():
+    assert_parity(validation_cases)
+
+
+# Seeded random inputs across every calculation type - whole and unrounded means and standard deviations (some below the 0.1 minimum), and z values
+# out to 6 standard deviations, so some are clamped, with some missing
+def random_cases(n=300, seed=0):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(n):
+        mu = rng.choice([rng.randint(-50, 50), rng.uniform(-50, 50), round(rng.uniform(-5, 5), 2)])
+        sigma = rng.choice([rng.randint(1, 20), rng.uniform(0.1, 20), rng.uniform(0.01, 0.2), round(rng.uniform(0.5, 5), 1)])
+        calc_type = rng.choice(["<", ">", "<>", "><"])
+        z1, z2 = sorted(mu + rng.uniform(-6, 6) * sigma for _ in range(2))
+        if rng.random() < 0.3:
+            z1, z2 = round(z1, rng.randint(0, 3)), round(z2, rng.randint(0, 3))
+        if rng.random() < 0.05:
+            z1 = None
+        if rng.random() < 0.05:
+            z2 = None
+        cases.append((mu, sigma, calc_type, z1, z2))
+    return cases
+
+
+def test_random_inputs_match_server():
+    assert_parity(random_cases())
+
+
+# Blank graph inputs and textbook values, where the figure is the one the page starts with
+def test_standard_normal_matches_server():
+    assert_parity([(0, 1, calc_type, z1, z2) for calc_type in ("<", ">", "<>", "><") for z1, z2 in ((-1.96, 1.96), (-1, 1), (0, 1.645), (-3.09, 3.09))])
+
+
+# Outputs of the client-side sweep for each (mu, sigma, calc_type, z2) case, and the query it sent to /api/sweep (None if it rejected the case)
+def clientside_sweeps(cases, error=None):
+    result = subprocess.run([node, "-e", sweep_harness, clientside_path], input=json.dumps({"cases": cases, "error": error}), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+# The client-side sweep must only send /api/sweep queries it accepts, and show the error for the ones it rejects
+def test_sweep_validation_matches_server():
+    cases = [(mu, sigma, calc_type, z2) for mu, sigma, calc_type, _, z2 in validation_cases] + [(0, 1, "<>", -4, None), (0, 1, "><", -3.99, None), (0.5, 0.25, "<>", -0.6, None)]
+    client = app.server.test_client()
+    for case, swept in zip(cases, clientside_sweeps(cases)):
+        response = client.post("/api/sweep", json=dict(zip(("mu", "sigma", "calc_type", "z2"), map(as_sent, case))))
+        if swept["sent"] is None:
+            assert response.status_code == 400, case
+            _, _, z2_invalid, error, mu_invalid, sigma_invalid, distribution_error, _ = swept["outputs"]
+            assert (z2_invalid and error) or ((mu_invalid or sigma_invalid) and distribution_error), case
+        else:
+            assert response.status_code == 200, case
+            assert client.post("/api/sweep", json=swept["sent"]).status_code == 200, case
+            assert swept["outputs"][2:] == [False, "", False, False, "", {"display": "none"}], case
+
+
+# An error from /api/sweep is shown, and the graph and results are left as they were
+def test_sweep_shows_server_error():
+    [swept] = clientside_sweeps([(0, 1, "<", None)], error="Too many sweeps")
+    assert swept["sent"] is not None
+    assert swept["outputs"] == [{"no_update": True}, {"no_update": True}, True, "Too many sweeps", False, False, "", {"no_update": True}]
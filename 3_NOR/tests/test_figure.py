@@ -0,0 +1,128 @@
+import json
+import math
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from nor_controller import build_figure
+from nor_figure import to_json
+from nor_model import calculate_probability_z1, calculate_probability_z1_z2, create_blank_fig, normal_distribution, normal_pdf, stat_colours
+
+# Golden tests for the plain-dict figure builder (nor_figure) - each figure is rebuilt with plotly.graph_objects as the app built it before the dict builder,
+# from the same model data, and the two must serialize to the same JSON, so a property dropped or misspelt by the dict builder is caught
+
+inputs = [(0, 1, "<", 1.96, None),
+          (0, 1, ">", -1.645, None),
+          (10, 2.5, "<>", 8, 13),
+          (5, 0.3, "><", 4.8, 5.5),
+          (-40, 15, "<", -62.5, None)]
+
+
+def shaded_scatter(x, y, **properties):
+    return go.Scatter(x=x, y=y, marker_color=stat_colours["norm"], fill="tozeroy", fillcolor=stat_colours["z"], **properties)
+
+
+# Mean and +/-1/2/3SD lines as graph_objects traces - one trace per group, with 10 points up each line and the lines separated by gaps
+def empirical_rule_scatters(mu, sigma):
+    groups = [(0, "Mean", stat_colours["mean"]),
+              (1, u"Mean ± 1SD", stat_colours["+-1std"]),
+              (2, u"Mean ± 2SD", stat_colours["+-2std"]),
+              (3, u"Mean ± 3SD", stat_colours["+-3std"])]
+    scatters = []
+    for k, name, colour in groups:
+        x, y, text = [], [], []
+        for offset in ([0] if k == 0 else [k, -k]):
+            line_x = mu + offset * sigma
+            x += [line_x] * 10 + [np.nan]
+            y += list(np.linspace(0, normal_pdf(line_x, mu, sigma), 10)) + [np.nan]
+            text += [f"Mean {'+' if offset > 0 else '-'} {abs(offset)}SD" if offset else "Mean"] * 10 + [None]
+        scatters.append(go.Scatter(x=x, y=y, text=text, mode="lines+markers", name=name, marker_color=colour, marker_opacity=0,
+                                   hovertemplate="%{text}: %{x:.3f}<extra></extra>"))
+    return scatters
+
+
+# The update_graph figure built with graph_objects
+def reference_figure(mu, sigma, calc_type, z1, z2):
+    x, norm_x = normal_distribution(mu, sigma)
+    fig = go.Figure(
+        go.Scatter(x=x,
+                   y=norm_x,
+                   dx=1,
+                   x0=-4,
+                   marker_color=stat_colours["norm"],
+                   name="Normal distribution",
+                   hoverinfo="skip"),
+        layout={"margin": dict(t=20, b=10, l=20, r=20),
+                "height": 400,
+                "font_size": 14})
+    fig.update_xaxes(dtick=math.ceil(sigma/2))
+    if calc_type in ("<", ">"):
+        _, section, pdf = calculate_probability_z1(mu, sigma, z1, calc_type)
+        fig.add_trace(shaded_scatter(section, pdf, name="Probability", **({"hoveron": "fills"} if calc_type == "<" else {})))
+    elif calc_type == "<>":
+        _, section, pdf = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
+        fig.add_trace(shaded_scatter(section, pdf, name="Probability"))
+    else:
+        _, lower, upper, pdf1, pdf2 = calculate_probability_z1_z2(mu, sigma, z1, z2, calc_type)
+        fig.add_trace(shaded_scatter(lower, pdf1, name="Probability"))
+        fig.add_trace(shaded_scatter(upper, pdf2, showlegend=False))
+    fig.add_traces(empirical_rule_scatters(mu, sigma))
+    fig.update_layout(dragmode=False)
+    return fig
+
+
+# The blank figure built with graph_objects
+def reference_blank_figure():
+    x, norm_x = normal_distribution(0, 1)
+    fig = go.Figure(
+        go.Scatter(x=x,
+                   y=norm_x,
+                   name="Normal distribution",
+                   marker_color=stat_colours["norm"],
+                   hoverinfo="skip"),
+        layout={"margin": dict(t=20, b=10, l=20, r=20),
+                "height": 400,
+                "font_size": 14})
+    fig.add_traces(empirical_rule_scatters(0, 1))
+    fig.update_layout(dragmode=False)
+    return fig
+
+
+# Assert two JSON values are the same - the same keys, strings and list lengths everywhere, with numbers equal to within float rounding
+def assert_same(value, expected, path="figure"):
+    if isinstance(expected, dict):
+        assert isinstance(value, dict) and value.keys() == expected.keys(), path
+        for key in expected:
+            assert_same(value[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(value, list) and len(value) == len(expected), path
+        for k, (item, expected_item) in enumerate(zip(value, expected)):
+            assert_same(item, expected_item, f"{path}[{k}]")
+    elif isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        assert isinstance(value, (int, float)) and not isinstance(value, bool), path
+        assert value == pytest.approx(expected, rel=1e-12, abs=1e-15), path
+    else:
+        assert value == expected, path
+
+
+def assert_same_json(fig, reference):
+    assert_same(json.loads(to_json(fig)), json.loads(to_json(reference.to_plotly_json())))
+
+
+@pytest.mark.parametrize("mu, sigma, calc_type, z1, z2", inputs)
+def test_graph_matches_graph_objects(mu, sigma, calc_type, z1, z2):
+    fig, _, valid = build_figure(mu, sigma, calc_type, z1, z2)
+    assert valid
+    assert_same_json(fig, reference_figure(mu, sigma, calc_type, z1, z2))
+
+
+def test_blank_figure_matches_graph_objects():
+    assert_same_json(create_blank_fig(), reference_blank_figure())
+
+
+# Figures must serialize with orjson as they are - otherwise plotly's to_json_plotly falls back to converting the whole figure (template included) value by value
+@pytest.mark.parametrize("mu, sigma, calc_type, z1, z2", inputs)
+def test_graph_serializes_without_cleaning(mu, sigma, calc_type, z1, z2):
+    orjson = pytest.importorskip("orjson")
+    fig, _, _ = build_figure(mu, sigma, calc_type, z1, z2)
+    orjson.dumps(fig, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,76 @@
+import gzip
+import os
+import re
+import brotli
+import pytest
+
+from nor_controller import app
+from nor_http import assets_dir
+
+# Compression, cache headers and conditional requests for the static, index and layout responses (see compress_static and conditional_layout in nor_controller.py)
+decompress = {"br": brotli.decompress, "gzip": gzip.decompress}
+
+
+@pytest.fixture
+def client():
+    return app.server.test_client()
+
+
+# Fingerprinted URL of an asset, as Dash writes it in the index page
+def fingerprinted_asset(name):
+    return f"/assets/{name}?m={os.path.getmtime(os.path.join(assets_dir, name))}"
+
+
+# URL of Dash's renderer bundle from the index page - fingerprinted by Dash
+def renderer_bundle(client):
+    return re.search(r'src="(/_dash-component-suites/dash/dash-renderer/build/dash_renderer[^"]*\.js)"', client.get("/").get_data(as_text=True)).group(1)
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+@pytest.mark.parametrize("path", ["/assets/nor_clientside.js", "/assets/style.css", "bundle", "/", "/_dash-layout"])
+def test_compressed_response_matches_identity(client, path, encoding):
+    path = renderer_bundle(client) if path == "bundle" else path
+    identity = client.get(path, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(path, headers={"Accept-Encoding": encoding})
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["Content-Encoding"] == encoding
+    assert len(compressed.data) < len(identity.data)
+    assert decompress[encoding](compressed.data) == identity.data
+
+
+def test_fingerprinted_urls_are_immutable(client):
+    for path in (fingerprinted_asset("style.css"), renderer_bundle(client)):
+        cache_control = client.get(path).cache_control
+        assert cache_control.immutable and cache_control.max_age == 31536000, path
+    cache_control = client.get("/assets/style.css").cache_control
+    assert not cache_control.immutable and cache_control.max_age == 3600
+
+
+def test_missing_asset_is_not_cached(client):
+    response = client.get("/assets/missing.css")
+    assert response.status_code == 404
+    assert not response.cache_control.public and response.cache_control.max_age is None
+
+
+@pytest.mark.parametrize("path", ["/", "/_dash-layout", "/assets/OpenSans-Regular.ttf"])
+@pytest.mark.parametrize("encoding", ["br", "gzip", "identity"])
+def test_unchanged_response_not_modified(client, path, encoding):
+    response = client.get(path, headers={"Accept-Encoding": encoding})
+    etag = response.headers["ETag"]
+    assert response.headers.get("Content-Encoding", "identity") == encoding
+    revalidated = client.get(path, headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    assert revalidated.headers["ETag"] == etag
+
+
+# The ETag of one content coding must not revalidate another - the cached body would be in the wrong coding
+@pytest.mark.parametrize("path", ["/", "/_dash-layout", "/assets/OpenSans-Regular.ttf"])
+def test_etag_of_other_encoding_not_matched(client, path):
+    br_etag = client.get(path, headers={"Accept-Encoding": "br"}).headers["ETag"]
+    identity_etag = client.get(path, headers={"Accept-Encoding": "identity"}).headers["ETag"]
+    assert br_etag != identity_etag
+    response = client.get(path, headers={"Accept-Encoding": "identity", "If-None-Match": br_etag})
+    assert response.status_code == 200 and "Content-Encoding" not in response.headers
+    response = client.get(path, headers={"Accept-Encoding": "br", "If-None-Match": identity_etag})
+    assert response.status_code == 200 and response.headers["Content-Encoding"] == "br"
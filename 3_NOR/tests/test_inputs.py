@@ -0,0 +1,27 @@
+import pytest
+
+from nor_controller import update_graph
+from nor_inputs import normalise_inputs
+
+
+@pytest.mark.parametrize("inputs, invalid", [((1e7, 1, "<", 1, None), "mu"),
+                                             (("0", 1, "<", 1, None), "mu"),
+                                             ((0, 0.05, "<", 1, None), "sigma"),
+                                             ((0, -1, "<", 1, None), "sigma"),
+                                             ((0, 1, None, 1, None), "calc_type"),
+                                             ((0, 1, "<", 2e6, None), "z"),
+                                             ((0, 1, "<>", 0, "1"), "z")])
+def test_error_names_invalid_input(inputs, invalid):
+    values, error, invalid_input = normalise_inputs(*inputs)
+    assert values is None and error
+    assert invalid_input == invalid
+
+
+# A mean or standard deviation error is shown under those inputs, and leaves z1 and z2 valid - a z error the reverse
+def test_error_marks_only_its_inputs():
+    _, _, z1_invalid, z2_invalid, error, mu_invalid, sigma_invalid, distribution_error, *_ = update_graph(1, 0, 0.05, "<", 1, None, None)
+    assert (z1_invalid, z2_invalid, error, mu_invalid, sigma_invalid) == (False, False, "", False, True)
+    assert distribution_error.startswith("The standard deviation")
+    _, _, z1_invalid, z2_invalid, error, mu_invalid, sigma_invalid, distribution_error, *_ = update_graph(1, 0, 1, "<", 2e6, None, None)
+    assert (z1_invalid, z2_invalid, mu_invalid, sigma_invalid, distribution_error) == (True, True, False, False, "")
+    assert error.startswith("z1")
@@ -0,0 +1,73 @@
+import os
+import signal
+import time
+import pytest
+
+from nor_jobs import JobRunner
+
+
+# Job functions - module level, so the pool processes can unpickle them by reference
+def quick_job(value, progress):
+    progress(0.5, "Half way")
+    return {"value": value}
+
+
+# Job that writes its process id to pid_path, then runs until it is cancelled or killed
+def endless_job(pid_path, progress):
+    with open(pid_path, "w") as f:
+        f.write(str(os.getpid()))
+    while True:
+        progress(0.5, "Running")
+        time.sleep(0.01)
+
+
+# Wait for a job to reach a final status, returning it
+def wait_for(runner, job_id, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = runner.status(job_id)
+        if status is not None and status["status"] in ("done", "cancelled", "error"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish: {runner.status(job_id)}")
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = JobRunner(str(tmp_path / "jobs"), max_jobs=1, ttl=60)
+    yield runner
+    if runner._pool is not None:
+        runner._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def test_job_result(runner):
+    job_id = runner.submit(quick_job, (3,))
+    assert wait_for(runner, job_id)["status"] == "done"
+    assert runner.result(job_id) == {"value": 3}
+    assert runner.status(job_id) is None
+
+
+def test_cancel(runner, tmp_path):
+    job_id = runner.submit(endless_job, (str(tmp_path / "pid"),), session_id="session")
+    while runner.status(job_id)["status"] != "running":
+        time.sleep(0.01)
+    runner.cancel_session("session")
+    assert wait_for(runner, job_id)["status"] == "cancelled"
+
+
+# A pool process killed mid-job (as by the out of memory killer) breaks the pool - the job must report an error, and the next job must run in a new pool
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_killed_pool_process(runner, tmp_path):
+    pid_path = tmp_path / "pid"
+    job_id = runner.submit(endless_job, (str(pid_path),))
+    deadline = time.monotonic() + 20
+    while not pid_path.exists() or not pid_path.read_text():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    os.kill(int(pid_path.read_text()), signal.SIGKILL)
+    assert wait_for(runner, job_id)["status"] == "error"
+    next_job_id = runner.submit(quick_job, (4,))
+    assert next_job_id is not None
+    assert wait_for(runner, next_job_id)["status"] == "done"
+    assert runner.result(next_job_id) == {"value": 4}
+    assert runner.stats()["error"] == 1
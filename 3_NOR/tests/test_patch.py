@@ -0,0 +1,71 @@
+import copy
+import json
+import pytest
+from dash import Patch, no_update
+
+from nor_controller import update_graph
+from nor_figure import to_json
+from test_figure import assert_same
+
+# Tests for the partial graph updates sent by update_graph - the Patch operations, applied to the graph on screen as the browser applies them, must give the
+# same figure as a full update for the new inputs
+
+calc_types = ["<", ">", "<>", "><"]
+distribution_pairs = [((0, 1), (0, 1)), ((0, 1), (2, 0.5)), ((10, 3), (-5.5, 20))]
+
+
+# Apply the operations of a serialized Patch to a figure, as dash-renderer does - each operation acts on the value at its location
+def apply_patch(figure, operations):
+    for operation in operations:
+        *path, last = operation["location"] or [None]
+        parent = figure
+        for key in path:
+            parent = parent[key]
+        params = operation["params"]
+        name = operation["operation"]
+        if name == "Assign":
+            parent[last] = params["value"]
+        elif name == "Delete":
+            del parent[last]
+        else:
+            target = parent[last] if last is not None else parent
+            if name == "Insert":
+                target.insert(params["index"], params["value"])
+            elif name == "Append":
+                target.append(params["value"])
+            elif name == "Extend":
+                target.extend(params["value"])
+            elif name == "Prepend":
+                target.insert(0, params["value"])
+            elif name == "Merge":
+                target.update(params["value"])
+            elif name == "Clear":
+                target.clear()
+            elif name == "Remove":
+                target.remove(params["value"])
+            else:
+                raise ValueError(f"Unknown patch operation {name}")
+    return figure
+
+
+# Graph inputs for a distribution and calculation type - z1 below the mean and z2 above it
+def graph_inputs(mu, sigma, calc_type):
+    return mu, sigma, calc_type, mu - 0.5 * sigma, mu + sigma if calc_type in ("<>", "><") else None
+
+
+@pytest.mark.parametrize("previous_calc_type", calc_types)
+@pytest.mark.parametrize("calc_type", calc_types)
+@pytest.mark.parametrize("previous_distribution, distribution", distribution_pairs)
+def test_patch_matches_full_update(previous_calc_type, calc_type, previous_distribution, distribution):
+    previous_figure, *_, rendered = update_graph(1, *graph_inputs(*previous_distribution, previous_calc_type), None)
+    figure = json.loads(to_json(previous_figure))
+    inputs = graph_inputs(*distribution, calc_type)
+    patch, *outputs = update_graph(2, *inputs, copy.deepcopy(rendered))
+    full_figure, *full_outputs = update_graph(2, *inputs, None)
+    assert outputs == full_outputs
+    if patch is no_update:
+        assert (previous_distribution, previous_calc_type) == (distribution, calc_type)
+    else:
+        assert isinstance(patch, Patch)
+        apply_patch(figure, json.loads(to_json(patch.to_plotly_json()))["operations"])
+    assert_same(figure, json.loads(to_json(full_figure)), f"{inputs} from {rendered}")
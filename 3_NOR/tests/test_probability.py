@@ -0,0 +1,67 @@
+import math
+import numpy as np
+import pytest
+
+from nor_model import batch_probabilities, build_normal_table, calc_type_codes, exact_probability, log_probability, table_probability
+
+# Absolute and relative error bounds of the lookup table's cdf, from its header (see normal_table_path)
+table_abs_error, table_rel_error = build_normal_table()[4:6]
+
+
+# Random queries of every calculation type with z1 < z2, out to 8 standard deviations (the extent of the lookup table)
+def random_queries(n=20000, seed=0, z_max=8):
+    rng = np.random.default_rng(seed)
+    mu = rng.uniform(-100, 100, n)
+    sigma = rng.uniform(0.1, 50, n)
+    z = np.sort(rng.uniform(-z_max, z_max, (2, n)), axis=0)
+    return mu, sigma, mu + z[0] * sigma, mu + z[1] * sigma, rng.choice(list(calc_type_codes), n)
+
+
+@pytest.mark.parametrize("calc_type", list(calc_type_codes))
+def test_table_matches_exact(calc_type):
+    mu, sigma, z1, z2, _ = random_queries()
+    table = table_probability(mu, sigma, z1, z2, calc_type)
+    exact = exact_probability(mu, sigma, z1, z2, calc_type)
+    # Each probability is one interpolated cdf value or the sum or difference of two, so within twice the table's absolute error
+    assert np.all(np.abs(table - exact) <= 2 * table_abs_error)
+    # Tail probabilities that are not differences keep the relative error bound
+    if calc_type != "<>":
+        assert np.all(np.abs(table - exact) <= table_rel_error * exact)
+
+
+# The app's single value path must agree with the vectorized path it short-cuts
+def test_scalar_matches_array():
+    mu, sigma, z1, z2, calc_type = random_queries(n=500, seed=1)
+    array = table_probability(mu, sigma, z1, z2, calc_type)
+    for k in range(len(mu)):
+        assert table_probability(mu[k], sigma[k], z1[k], z2[k], calc_type[k]) == pytest.approx(array[k], rel=1e-12, abs=1e-15)
+
+
+def test_log_matches_exact():
+    mu, sigma, z1, z2, calc_type = random_queries(seed=2)
+    exact = exact_probability(mu, sigma, z1, z2, calc_type)
+    resolved = exact > 1e-300
+    assert np.allclose(log_probability(mu, sigma, z1, z2, calc_type)[resolved], np.log(exact[resolved]), rtol=1e-12, atol=1e-12)
+
+
+# Beyond about 38 standard deviations the probability underflows to 0, but its log is still resolved - P(Z < z) ~ pdf(z) / |z| for large |z|
+@pytest.mark.parametrize("calc_type, z1, z2", [("<", -60, None), (">", 60, None), ("<>", 50, 60), ("><", -45, 45)])
+def test_log_far_tail(calc_type, z1, z2):
+    assert exact_probability(0, 1, z1, z2, calc_type) == 0
+    z = abs(z1)
+    expected = -0.5 * z * z - math.log(z * math.sqrt(2 * math.pi)) + (math.log(2) if calc_type == "><" else 0)
+    assert log_probability(0, 1, z1, z2, calc_type) == pytest.approx(expected, abs=1e-3)
+
+
+def test_batch_log():
+    log = batch_probabilities([0, 0, 0], [1, 1, 0], [-50, 1, 1], [None, 0, 2], ["<", "<>", "<>"], log=True)
+    assert log[0] == pytest.approx(log_probability(0, 1, -50, None, "<"))
+    # z1 greater than z2, and sigma of 0, are rejected
+    assert np.isnan(log[1]) and np.isnan(log[2])
+
+
+# The batch path does not apply the graph input limits (nor_inputs.py) - a sigma below 0.1, values beyond +/-1,000,000 and z beyond +/-4SD are computed as given
+def test_batch_outside_input_limits():
+    probability = batch_probabilities([0, 2e6, 0], [0.05, 1, 1], [0.05, 2e6 + 1, -6], None, "<", decimals=None)
+    assert probability == pytest.approx(exact_probability(np.array([0, 2e6, 0]), np.array([0.05, 1, 1]), np.array([0.05, 2e6 + 1, -6]), None, "<") * 100, rel=1e-6)
+    assert 0 < probability[2] < 1e-6
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from nor_model import calculate_probability_z1, calculate_probability_z1_z2, normal_distribution, normal_pdf, overlay_distributions, sampling_tolerance, standard_sampling_grid
+
+distributions = [(0, 1), (0, 0.1), (10, 2.5), (-3.5, 15), (250, 1000)]
+
+
+# Largest deviation of the linear interpolation of a sampled curve (x, y) from the analytic pdf, as a fraction of the curve peak - checked on 50 points in every step
+def max_interpolation_error(x, y, mu, sigma):
+    fine_x = np.concatenate([np.linspace(x[k], x[k + 1], 50) for k in range(len(x) - 1)])
+    return np.abs(np.interp(fine_x, x, y) - normal_pdf(fine_x, mu, sigma)).max() / normal_pdf(mu, mu, sigma)
+
+
+@pytest.mark.parametrize("mu, sigma", distributions)
+def test_base_curve_within_tolerance(mu, sigma):
+    x, y = normal_distribution(mu, sigma)
+    assert np.all(np.diff(x) > 0)
+    assert max_interpolation_error(x, y, mu, sigma) <= sampling_tolerance
+
+
+# Shaded areas can run past the base curve, so the whole standard grid must be within tolerance
+def test_standard_grid_within_tolerance():
+    std_z = standard_sampling_grid()
+    assert np.array_equal(std_z, -std_z[::-1])
+    assert 0 in std_z
+    assert max_interpolation_error(std_z, normal_pdf(std_z, 0, 1), 0, 1) <= sampling_tolerance
+
+
+@pytest.mark.parametrize("mu, sigma", distributions)
+def test_shaded_end_points_are_exact(mu, sigma):
+    z1, z2 = mu - 0.7315 * sigma, mu + 1.2347 * sigma
+    _, x, y = calculate_probability_z1(mu, sigma, z1, "<")
+    assert x[-1] == z1 and y[-1] == normal_pdf(z1, mu, sigma)
+    _, x, _ = calculate_probability_z1(mu, sigma, z1, ">")
+    assert x[0] == z1
+    _, x, _ = calculate_probability_z1_z2(mu, sigma, z1, z2, "<>")
+    assert {x[0], x[-1]} == {z1, z2}
+    _, x1, x2, _, _ = calculate_probability_z1_z2(mu, sigma, z1, z2, "><")
+    assert x1[-1] == z1 and x2[0] == z2
+    for x in (x1, x2):
+        assert max_interpolation_error(x, normal_pdf(x, mu, sigma), mu, sigma) <= sampling_tolerance
+
+
+# Narrow curves overlaid with a wide one are sampled more coarsely than one pixel of their own, but keep their peak and the points under the empirical rule lines
+def test_overlay_keeps_narrow_curve_peaks():
+    mu = np.append(np.linspace(-5, 5, 19), 0)
+    sigma = np.append(np.full(19, 0.1), 50)
+    _, curves, _ = overlay_distributions(mu, sigma)
+    for (x, y), m, s in zip(curves, mu, sigma):
+        rule_x = m + s * np.arange(-3, 4)
+        assert np.isin(rule_x, x).all()
+        assert y.max() == pytest.approx(normal_pdf(m, m, s), rel=1e-12)
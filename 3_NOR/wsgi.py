@@ -0,0 +1,6 @@
+from nor_controller import app, warm_caches
+
+# Production WSGI entry point - gunicorn --config gunicorn.conf.py wsgi:server
+# With preload_app (see gunicorn.conf.py) this module is imported once in the gunicorn master, so caches are warmed before workers are forked
+warm_caches()
+server = app.server